@@ -0,0 +1,106 @@
+"""Synthetic documentation trees for benchmarks."""
+
+from __future__ import annotations
+
+import os
+import random
+
+WORDS = [
+    "server", "route", "markdown", "render", "cache", "theme", "page", "build",
+    "static", "request", "response", "header", "config", "folder", "navigation",
+    "sitemap", "install", "guide", "module", "function", "class", "option", "value",
+    "default", "example", "output", "input", "error", "table",
+]
+
+CODE_SAMPLES = {
+    "python": "def handler(request):\n    data = load(request.path)\n    return render(data)\n",
+    "javascript": "const res = await fetch('/api');\nconst data = await res.json();\n",
+    "bash": "pip install mkpy-client\nmkpy serve --folder docs --port 3000\n",
+}
+
+
+def _sentence(rng: random.Random, words: int) -> str:
+    text = " ".join(rng.choice(WORDS) for _ in range(words))
+    return text.capitalize() + "."
+
+
+def _paragraph(rng: random.Random) -> str:
+    return " ".join(_sentence(rng, rng.randint(6, 16)) for _ in range(rng.randint(2, 5)))
+
+
+def _table(rng: random.Random) -> str:
+    columns = rng.randint(2, 5)
+    header = "| " + " | ".join(rng.choice(WORDS).title() for _ in range(columns)) + " |"
+    divider = "|" + "---|" * columns
+    rows = [
+        "| " + " | ".join(rng.choice(WORDS) for _ in range(columns)) + " |"
+        for _ in range(rng.randint(3, 10))
+    ]
+    return "\n".join([header, divider, *rows])
+
+
+def _code(rng: random.Random) -> str:
+    language = rng.choice(list(CODE_SAMPLES))
+    return f"```{language}\n{CODE_SAMPLES[language] * rng.randint(1, 4)}```"
+
+
+def page(rng: random.Random, title: str, links: list[str]) -> str:
+    """
+    Generate one markdown page.
+
+    Args:
+        rng: Seeded random generator.
+        title: Page title used for the first heading.
+        links: Routes of other pages to link to.
+
+    Returns:
+        Markdown source.
+    """
+    blocks = [f"# {title}", _paragraph(rng)]
+    for section in range(rng.randint(2, 6)):
+        blocks.append(f"## {_sentence(rng, 3)[:-1]} {section}")
+        blocks.append(_paragraph(rng))
+        kind = rng.random()
+        if kind < 0.3:
+            blocks.append(_table(rng))
+        elif kind < 0.7:
+            blocks.append(_code(rng))
+        else:
+            blocks.append("\n".join(f"- {_sentence(rng, 5)}" for _ in range(rng.randint(3, 8))))
+        if links:
+            target = rng.choice(links)
+            blocks.append(f"See [{target}]({target}) for details.")
+    return "\n\n".join(blocks) + "\n"
+
+
+def generate(folder: str, pages: int, seed: int = 0, depth: int = 4) -> list[str]:
+    """
+    Write a synthetic doc tree with the given number of pages.
+
+    Pages are spread over nested directories up to ``depth`` levels deep
+    and link to each other.
+
+    Args:
+        folder: Destination folder, created if missing.
+        pages: Number of markdown files to write.
+        seed: Random seed, so trees are reproducible.
+        depth: Maximum directory nesting.
+
+    Returns:
+        List of generated routes.
+    """
+    rng = random.Random(seed)
+    routes = ["/"]
+    paths = ["index.md"]
+    for i in range(1, pages):
+        parts = [f"section{rng.randint(0, 9)}" for _ in range(rng.randint(0, depth))]
+        paths.append("/".join([*parts, f"page{i}.md"]))
+        routes.append("/" + "/".join([*parts, f"page{i}"]))
+
+    for i, rel_path in enumerate(paths):
+        full_path = os.path.join(folder, rel_path)
+        os.makedirs(os.path.dirname(full_path), exist_ok=True)
+        links = [rng.choice(routes) for _ in range(3)]
+        with open(full_path, "w", encoding="utf-8") as f:
+            f.write(page(rng, "Home" if i == 0 else f"Page {i}", links))
+    return routes
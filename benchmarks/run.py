@@ -0,0 +1,258 @@
+"""
+Benchmark suite for mkpy.
+
+Generates synthetic doc trees and measures ``Docs.__init__`` startup,
+``Docs.render`` latency (cold and cached), ``mkpy build`` wall time and peak RSS, and server
+throughput under a local load generator. Results are printed as JSON.
+
+Usage:
+    python benchmarks/run.py --sizes 10,1000,10000 --output results.json
+    python benchmarks/run.py --compare results.json
+"""
+
+from __future__ import annotations
+
+import argparse
+import http.client
+import json
+import os
+import platform
+import random
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+
+from corpus import generate
+
+from mkpy import Docs, __version__, markdown
+from mkpy.server import DocsHandler, create_server
+
+BUILD_SCRIPT = """
+import contextlib, json, os, resource, sys, time
+from mkpy.cli import app
+
+folder, output, result = sys.argv[1:4]
+started = time.perf_counter()
+with open(os.devnull, "w") as devnull, contextlib.redirect_stdout(devnull):
+    app(["build", "--folder", folder, "--output", output], standalone_mode=False)
+elapsed = time.perf_counter() - started
+rss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+if sys.platform != "darwin":
+    rss *= 1024
+with open(result, "w") as f:
+    json.dump({"wall_s": elapsed, "peak_rss_bytes": rss}, f)
+"""
+
+
+def percentiles(samples: list[float]) -> dict[str, float]:
+    """Summarize latency samples (seconds) in milliseconds."""
+    ordered = sorted(samples)
+
+    def pick(q: float) -> float:
+        return ordered[min(len(ordered) - 1, int(q * len(ordered)))] * 1000
+
+    return {
+        "count": len(ordered),
+        "mean_ms": sum(ordered) / len(ordered) * 1000,
+        "p50_ms": pick(0.50),
+        "p95_ms": pick(0.95),
+        "p99_ms": pick(0.99),
+        "max_ms": ordered[-1] * 1000,
+    }
+
+
+def bench_startup(folder: str, repeat: int) -> dict[str, float]:
+    samples = []
+    for _ in range(repeat):
+        started = time.perf_counter()
+        Docs(folder=folder)
+        samples.append(time.perf_counter() - started)
+    return percentiles(samples)
+
+
+def bench_render(docs: Docs, routes: list[str], samples: int, cold: bool) -> dict[str, float]:
+    """
+    Time ``Docs.render`` for random routes.
+
+    Cold samples clear the render cache and the code highlighting memo
+    first, so every sample converts its markdown and lexes its code blocks;
+    warm samples render routes that are already cached.
+    """
+    rng = random.Random(1)
+    picked = [rng.choice(routes) for _ in range(samples)]
+    if not cold:
+        for route in set(picked):
+            docs.render(docs.routes[route])
+    timings = []
+    for route in picked:
+        if cold:
+            docs.cache.clear()
+            markdown._highlighted.clear()
+        started = time.perf_counter()
+        docs.render(docs.routes[route])
+        timings.append(time.perf_counter() - started)
+    return percentiles(timings)
+
+
+def bench_build(folder: str, workdir: str) -> dict[str, float]:
+    output = os.path.join(workdir, "site")
+    result = os.path.join(workdir, "build.json")
+    subprocess.run(
+        [sys.executable, "-c", BUILD_SCRIPT, folder, output, result],
+        check=True,
+    )
+    with open(result, encoding="utf-8") as f:
+        return json.load(f)
+
+
+def bench_server(
+    docs: Docs, routes: list[str], concurrency: int, duration: float
+) -> dict[str, float]:
+    DocsHandler.log_message = lambda *args: None  # type: ignore[method-assign]
+    docs.port = 0
+    server = create_server(docs)
+    port = server.server_address[1]
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+
+    latencies: list[float] = []
+    errors = 0
+    lock = threading.Lock()
+    deadline = time.perf_counter() + duration
+
+    def client(seed: int) -> None:
+        nonlocal errors
+        rng = random.Random(seed)
+        local, failed = [], 0
+        while time.perf_counter() < deadline:
+            started = time.perf_counter()
+            try:
+                conn = http.client.HTTPConnection("127.0.0.1", port, timeout=30)
+                conn.request("GET", rng.choice(routes))
+                response = conn.getresponse()
+                response.read()
+                conn.close()
+                if response.status != 200:
+                    failed += 1
+            except OSError:
+                failed += 1
+            local.append(time.perf_counter() - started)
+        with lock:
+            latencies.extend(local)
+            errors += failed
+
+    started = time.perf_counter()
+    clients = [threading.Thread(target=client, args=(i,)) for i in range(concurrency)]
+    for thread in clients:
+        thread.start()
+    for thread in clients:
+        thread.join()
+    elapsed = time.perf_counter() - started
+
+    server.shutdown()
+    server.server_close()
+    return {
+        "concurrency": concurrency,
+        "requests": len(latencies),
+        "errors": errors,
+        "requests_per_s": len(latencies) / elapsed,
+        "latency": percentiles(latencies),
+    }
+
+
+def run(args: argparse.Namespace) -> dict:
+    results = []
+    for size in args.sizes:
+        with tempfile.TemporaryDirectory() as workdir:
+            folder = os.path.join(workdir, "docs")
+            routes = generate(folder, size, seed=args.seed)
+            print(f"[{size} pages] generated", file=sys.stderr)
+
+            entry: dict = {"pages": size}
+            entry["startup"] = bench_startup(folder, args.repeat)
+            docs = Docs(folder=folder)
+            entry["render_cold"] = bench_render(docs, routes, args.render_samples, cold=True)
+            entry["render_warm"] = bench_render(docs, routes, args.render_samples, cold=False)
+            print(f"[{size} pages] render done", file=sys.stderr)
+            if not args.skip_build:
+                entry["build"] = bench_build(folder, workdir)
+                print(f"[{size} pages] build done", file=sys.stderr)
+            if not args.skip_server:
+                entry["server"] = bench_server(docs, routes, args.concurrency, args.duration)
+                print(f"[{size} pages] server done", file=sys.stderr)
+            results.append(entry)
+
+    return {
+        "mkpy_version": __version__,
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "timestamp": time.strftime("%Y-%m-%dT%H:%M:%SZ", time.gmtime()),
+        "seed": args.seed,
+        "results": results,
+    }
+
+
+def compare(baseline: dict, current: dict) -> list[str]:
+    """Describe changes of the headline numbers between two result files."""
+    metrics = [
+        ("startup", "p50_ms"),
+        ("render_cold", "p50_ms"),
+        ("render_cold", "p95_ms"),
+        ("render_warm", "p50_ms"),
+        ("build", "wall_s"),
+        ("build", "peak_rss_bytes"),
+        ("server", "requests_per_s"),
+    ]
+    old_by_size = {entry["pages"]: entry for entry in baseline["results"]}
+    lines = [f"{baseline['mkpy_version']} -> {current['mkpy_version']}"]
+    for entry in current["results"]:
+        old = old_by_size.get(entry["pages"])
+        if old is None:
+            continue
+        for section, key in metrics:
+            if section in entry and section in old:
+                before, after = old[section][key], entry[section][key]
+                change = (after - before) / before * 100 if before else 0.0
+                lines.append(
+                    f"{entry['pages']:>6} pages  {section}.{key:<16} "
+                    f"{before:12.3f} -> {after:12.3f}  ({change:+.1f}%)"
+                )
+    return lines
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument(
+        "--sizes",
+        type=lambda value: [int(part) for part in value.split(",")],
+        default=[10, 1000, 10000],
+        help="Comma-separated page counts (default: 10,1000,10000)",
+    )
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--repeat", type=int, default=3, help="Startup repetitions")
+    parser.add_argument("--render-samples", type=int, default=100)
+    parser.add_argument("--concurrency", type=int, default=8)
+    parser.add_argument("--duration", type=float, default=5.0, help="Seconds of load")
+    parser.add_argument("--skip-build", action="store_true")
+    parser.add_argument("--skip-server", action="store_true")
+    parser.add_argument("--output", help="Write JSON results to this file")
+    parser.add_argument("--compare", help="Baseline JSON file to compare against")
+    args = parser.parse_args()
+
+    current = run(args)
+    text = json.dumps(current, indent=2)
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as f:
+            f.write(text + "\n")
+    else:
+        print(text)
+
+    if args.compare:
+        with open(args.compare, encoding="utf-8") as f:
+            baseline = json.load(f)
+        print("\n".join(compare(baseline, current)), file=sys.stderr)
+
+
+if __name__ == "__main__":
+    main()
@@ -2,7 +2,8 @@
 
 from .docs import Docs
 from .markdown import render as render_markdown
+from .server import Sites
 
 __version__ = "1.4.2"
 
-__all__ = ["Docs", "render_markdown", "__version__"]
+__all__ = ["Docs", "Sites", "render_markdown", "__version__"]
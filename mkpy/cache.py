@@ -0,0 +1,69 @@
+"""Render cache for mkpy."""
+
+from __future__ import annotations
+
+import sys
+import threading
+from collections import OrderedDict
+from collections.abc import Hashable
+from typing import Callable
+
+
+class RenderCache:
+    """
+    Bounded LRU cache of converted markdown.
+
+    Keys identify a page version, e.g. (path, mtime_ns, size), so a
+    changed file simply misses and the stale entry ages out. One cache
+    can be shared by several Docs instances.
+    """
+
+    def __init__(self, max_entries: int = 4096) -> None:
+        self.max_entries = max_entries
+        self.hits = 0
+        self.misses = 0
+        self._entries: OrderedDict[Hashable, str] = OrderedDict()
+        self._lock = threading.Lock()
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def __contains__(self, key: Hashable) -> bool:
+        return key in self._entries
+
+    def get(self, key: Hashable) -> str | None:
+        """Return a cached value and mark it recently used."""
+        with self._lock:
+            value = self._entries.get(key)
+            if value is None:
+                self.misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return value
+
+    def put(self, key: Hashable, value: str) -> None:
+        """Store a value, evicting the least recently used entries."""
+        with self._lock:
+            self._entries[key] = value
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+
+    def memory_usage(self, owns: Callable[[Hashable], bool] | None = None) -> int:
+        """
+        Approximate bytes held by cached values.
+
+        Args:
+            owns: Optional filter selecting the keys to count.
+        """
+        with self._lock:
+            return sum(
+                sys.getsizeof(value)
+                for key, value in self._entries.items()
+                if owns is None or owns(key)
+            )
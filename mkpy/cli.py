@@ -1,7 +1,12 @@
 from __future__ import annotations
 
+import cProfile
+import functools
+import gzip
 import importlib.util
+import io
 import os
+import pstats
 import sys
 from typing import Annotated
 
@@ -9,11 +14,25 @@ import typer
 from typing_extensions import Annotated as TyperAnnotated
 
 from .docs import Docs
+from .links import LinkGraph
+from .output import BuildOutput
+from .prewarm import load_access_list
+from .server import Limits, Sites, run_built_server
+from .static import LINK_GRAPH_FILE, NOT_FOUND_PAGE, SEARCH_INDEX_FILE, route_filename
+
+LIMIT_OPTIONS = ("workers", "max_renders", "queue_depth", "read_timeout", "write_timeout")
+LIMIT_FIELDS = (*LIMIT_OPTIONS, "render_wait", "retry_after")
+
+def _passed(ctx: typer.Context, name: str) -> bool:
+    """Whether an option was given on the command line or via the environment."""
+    source = ctx.get_parameter_source(name)
+    return source is not None and source.name != "DEFAULT"
+
 
 app = typer.Typer(help="Minimalistic documentation generator and server")
 
 
-def load_docs_from_file(file_path: str) -> Docs:
+def load_docs_from_file(file_path: str) -> Docs | Sites:
     if not os.path.isfile(file_path):
         raise FileNotFoundError(f"File '{file_path}' not found")
 
@@ -28,9 +47,10 @@ def load_docs_from_file(file_path: str) -> Docs:
     docs = None
     for name in dir(module):
         obj = getattr(module, name)
-        if isinstance(obj, Docs):
+        if isinstance(obj, Sites):
+            return obj
+        if isinstance(obj, Docs) and docs is None:
             docs = obj
-            break
 
     if docs is None:
         raise ValueError(f"No Docs instance found in '{file_path}'")
@@ -38,8 +58,16 @@ def load_docs_from_file(file_path: str) -> Docs:
     return docs
 
 
+def write_output_file(out: BuildOutput, relative: str, data: bytes, compress: bool) -> None:
+    """Write a built file and, with compress, its precompressed .gz sibling."""
+    out.write(relative, data)
+    if compress:
+        out.write(relative + ".gz", gzip.compress(data, compresslevel=9, mtime=0))
+
+
 @app.command()
 def serve(
+    ctx: typer.Context,
     file: Annotated[
         str | None,
         typer.Argument(help="Python file with Docs configuration"),
@@ -68,8 +96,75 @@ def serve(
         bool,
         typer.Option("--no-nav", help="Disable navigation menu"),
     ] = False,
+    no_highlight: Annotated[
+        bool,
+        typer.Option("--no-highlight", help="Disable code highlighting"),
+    ] = False,
+    profile: Annotated[
+        bool,
+        typer.Option("--profile", help="Trace render phases, view at /_mkpy/profile"),
+    ] = False,
+    instant_nav: Annotated[
+        bool,
+        typer.Option("--instant-nav", help="Swap page content without full reloads"),
+    ] = False,
+    toc: Annotated[
+        bool,
+        typer.Option("--toc", help="Show a table of contents on each page"),
+    ] = False,
+    from_build: Annotated[
+        str | None,
+        typer.Option("--from-build", help="Serve a directory produced by mkpy build"),
+    ] = None,
+    prewarm: Annotated[
+        bool,
+        typer.Option("--prewarm", help="Render pages in the background on startup"),
+    ] = False,
+    prewarm_list: Annotated[
+        str | None,
+        typer.Option("--prewarm-list", help="Access list or log ranking routes to prewarm"),
+    ] = None,
+    prewarm_top: Annotated[
+        int | None,
+        typer.Option("--prewarm-top", help="Prewarm only the N most requested routes"),
+    ] = None,
+    prewarm_workers: Annotated[
+        int,
+        typer.Option("--prewarm-workers", help="Background threads used for prewarming"),
+    ] = 2,
+    workers: Annotated[
+        int,
+        typer.Option("--workers", help="Threads handling connections"),
+    ] = 16,
+    max_renders: Annotated[
+        int,
+        typer.Option("--max-renders", help="Pages rendered at the same time"),
+    ] = 4,
+    queue_depth: Annotated[
+        int,
+        typer.Option("--queue-depth", help="Connections waiting for a worker before 503"),
+    ] = 64,
+    read_timeout: Annotated[
+        float,
+        typer.Option("--read-timeout", help="Seconds a client may take to send request line and headers"),
+    ] = 10.0,
+    write_timeout: Annotated[
+        float,
+        typer.Option("--write-timeout", help="Seconds a client may take to receive a response"),
+    ] = 30.0,
 ) -> None:
     """Serve documentation."""
+    limits = Limits(
+        workers=workers,
+        max_renders=max_renders,
+        queue_depth=queue_depth,
+        read_timeout=read_timeout,
+        write_timeout=write_timeout,
+    )
+    if from_build:
+        run_built_server(from_build, host=host, port=port, limits=limits)
+        return
+
     if file:
         docs = load_docs_from_file(file)
     else:
@@ -80,7 +175,28 @@ def serve(
             host=host,
             port=port,
             show_nav=not no_nav,
+            highlight=not no_highlight,
+            instant_nav=instant_nav,
+            show_toc=toc,
         )
+    for site in docs.sites.values() if isinstance(docs, Sites) else [docs]:
+        site.profiler.enabled = site.profiler.enabled or profile
+        if prewarm or prewarm_list:
+            routes = None
+            if prewarm_list:
+                routes = load_access_list(
+                    prewarm_list, site.routes, top=prewarm_top, base_path=site.base_path
+                )
+            site.prewarm(routes, workers=prewarm_workers)
+    if file:
+        # limits set in the configuration file win over option defaults
+        if any(_passed(ctx, name) for name in LIMIT_OPTIONS):
+            docs.limits = Limits(**{
+                name: getattr(limits if _passed(ctx, name) else docs.limits, name)
+                for name in LIMIT_FIELDS
+            })
+    else:
+        docs.limits = limits
     docs.run()
 
 
@@ -106,6 +222,34 @@ def build(
         bool,
         typer.Option("--no-nav", help="Disable navigation menu"),
     ] = False,
+    no_highlight: Annotated[
+        bool,
+        typer.Option("--no-highlight", help="Disable code highlighting"),
+    ] = False,
+    toc: Annotated[
+        bool,
+        typer.Option("--toc", help="Show a table of contents on each page"),
+    ] = False,
+    site_url: Annotated[
+        str | None,
+        typer.Option("--site-url", help="Public base URL; sitemap.xml is only written with it"),
+    ] = None,
+    compress: Annotated[
+        bool,
+        typer.Option("--compress", help="Write .gz siblings for static serving"),
+    ] = False,
+    strict: Annotated[
+        bool,
+        typer.Option("--strict", help="Fail the build on broken internal links"),
+    ] = False,
+    profile: Annotated[
+        bool,
+        typer.Option("--profile", help="Profile the build with cProfile"),
+    ] = False,
+    profile_output: Annotated[
+        str,
+        typer.Option("--profile-output", help="File to dump pstats data to"),
+    ] = "mkpy-build.prof",
 ) -> None:
     from rich.console import Console
     from rich.progress import Progress, SpinnerColumn, TextColumn, BarColumn, TaskProgressColumn
@@ -115,16 +259,24 @@ def build(
 
     console = Console()
 
-    os.makedirs(output, exist_ok=True)
+    profiler = cProfile.Profile() if profile else None
+    if profiler is not None:
+        profiler.enable()
+
     docs = Docs(
         folder=folder,
         title=title,
         theme=theme,
         show_nav=not no_nav,
+        highlight=not no_highlight,
+        show_toc=toc,
     )
 
     routes = list(docs.routes.items())
     total = len(routes)
+    out = BuildOutput(output)
+    graph = LinkGraph.load(out.state_path(LINK_GRAPH_FILE))
+    out.open()
 
     console.print(Panel.fit(
         f"[bold cyan]MKPY Build[/bold cyan]\n"
@@ -149,30 +301,81 @@ def build(
         for route, md_path in routes:
             html_content = docs.render(md_path)
 
-            if route == "/":
-                html_filename = "index.html"
-            else:
-                html_filename = f"{route.lstrip('/')}.html"
-
-            output_path = os.path.join(output, html_filename)
-
-            os.makedirs(os.path.dirname(output_path), exist_ok=True)
+            html_filename = route_filename(route)
+            write_output_file(out, html_filename, html_content.encode("utf-8"), compress)
+            version = (md_path, *docs.pages.get(md_path).version)
+            graph.update(route, version, functools.partial(docs.render_content, md_path))
 
-            with open(output_path, "w", encoding="utf-8") as f:
-                f.write(html_content)
             relative_md = os.path.relpath(md_path, folder)
             table.add_row("✓", relative_md, html_filename)
 
             progress.advance(task)
 
+    not_found = docs.render_error(404, "Page Not Found").encode("utf-8")
+    write_output_file(out, NOT_FOUND_PAGE, not_found, compress)
+
+    # without a public URL the sitemap would list http://127.0.0.1 addresses
+    sitemaps: dict[str, bytes] = {}
+    if site_url:
+        docs.site_url = site_url.rstrip("/")
+        sitemaps = docs.sitemap_files(docs.base_url)
+    for filename, content in sitemaps.items():
+        out.write(filename, content)
+    out.write(SEARCH_INDEX_FILE, docs.search_index())
+
+    route_set = set(docs.routes)
+    graph.prune(route_set)
+    broken = graph.broken(route_set, exists=lambda target: docs.static_file(target) is not None)
+    orphans = graph.orphans(route_set)
+
+    failed = strict and bool(broken)
+    if failed:
+        out.discard()
+    else:
+        out.commit()
+        graph.save(out.state_path(LINK_GRAPH_FILE))
+
+    if profiler is not None:
+        profiler.disable()
+        profiler.dump_stats(profile_output)
+        stream = io.StringIO()
+        pstats.Stats(profiler, stream=stream).sort_stats("cumulative").print_stats(25)
+        console.out(stream.getvalue(), highlight=False)
+        console.print(f"Profile written to [yellow]{os.path.abspath(profile_output)}[/yellow]")
+
     console.print()
     console.print(table)
 
+    if broken:
+        broken_table = Table(box=box.ROUNDED, show_header=True, header_style="bold red")
+        broken_table.add_column("Page", style="cyan")
+        broken_table.add_column("Broken link", style="red")
+        for source, target in broken:
+            broken_table.add_row(source, target)
+        console.print()
+        console.print(broken_table)
+    if orphans:
+        console.print()
+        console.print(f"[yellow]Orphan pages (no incoming links):[/yellow] {', '.join(orphans)}")
+
+    if not site_url:
+        console.print()
+        console.print("[yellow]No --site-url given, sitemap.xml was not written[/yellow]")
+
     console.print()
+    if failed:
+        console.print(
+            "[bold red]✗ Broken links found (--strict), previous output kept[/bold red]"
+        )
+        raise typer.Exit(code=1)
+
     console.print(Panel.fit(
         f"[bold green]✓ Build complete![/bold green]\n"
         f"Output directory: [yellow]{os.path.abspath(output)}[/yellow]\n"
-        f"Files created: [cyan]{total}[/cyan]",
+        f"Files written: [cyan]{out.written}[/cyan] "
+        f"(unchanged: [cyan]{out.unchanged}[/cyan])\n"
+        f"Sitemap files: [cyan]{len(sitemaps)}[/cyan]\n"
+        f"Broken links: [{'red' if broken else 'cyan'}]{len(broken)}[/]",
         border_style="green",
     ))
 
@@ -1,13 +1,83 @@
 from __future__ import annotations
 
+import html
+import json
 import os
+import sys
+import time
 from typing import Annotated, Literal
 
 from annotated_doc import Doc
 
-from .markdown import extract_title, render as render_markdown
+from .markdown import highlight_css, render as render_markdown
+from .cache import RenderCache
+from .metrics import Metrics
+from .git import GitPageStore, repository
+from .meta import toc_entries
+from .pages import PageStore
+from .prewarm import Prewarmer
+from .profiling import PHASES, Profiler
+from .singleflight import SingleFlight
+from .sitemap import SITEMAP_MAX_URLS, build_sitemaps
 from .themes import THEMES, ThemeName
-from .server import run_server
+from .server import Limits, run_server
+
+
+INSTANT_NAV_SCRIPT = """<script data-base="%s">
+    // Instant navigation: prefetch page fragments on hover, swap <main> on click
+    (function () {
+        const base = document.currentScript.dataset.base;
+        const pages = new Map();
+        function eligible(link) {
+            return link.origin === location.origin && !link.hash && !link.target
+                && !link.hasAttribute('download')
+                && (link.pathname === base || link.pathname.startsWith(base + '/'));
+        }
+        function load(href) {
+            if (!pages.has(href)) {
+                // only routes have a fragment; anything else is a small 404
+                const route = new URL(href).pathname.slice(base.length).replace(/\\/$/, '');
+                const url = location.origin + base + '/_mkpy/frag' + route;
+                const page = fetch(url).then(response => {
+                    if (!response.ok || !response.headers.get('X-Mkpy-Fragment')) {
+                        throw new Error('no fragment');
+                    }
+                    return response.text();
+                });
+                page.catch(() => pages.delete(href));
+                pages.set(href, page);
+            }
+            return pages.get(href);
+        }
+        function show(html) {
+            document.querySelector('main').innerHTML = html;
+            const path = location.pathname.replace(/\\/$/, '') || '/';
+            document.querySelectorAll('.mkpy-nav a').forEach(link => {
+                const current = (new URL(link.href).pathname.replace(/\\/$/, '') || '/') === path;
+                link.style.fontWeight = current ? '600' : '';
+                link.style.textDecoration = current ? 'underline' : '';
+            });
+        }
+        document.addEventListener('mouseover', e => {
+            const link = e.target.closest('a');
+            if (link && eligible(link)) load(link.href);
+        });
+        document.addEventListener('click', e => {
+            const link = e.target.closest('a');
+            if (!link || !eligible(link) || e.button !== 0
+                || e.metaKey || e.ctrlKey || e.shiftKey || e.altKey) return;
+            e.preventDefault();
+            load(link.href).then(html => {
+                history.pushState(null, '', link.href);
+                show(html);
+                window.scrollTo(0, 0);
+            }).catch(() => { location.href = link.href; });
+        });
+        window.addEventListener('popstate', () => {
+            load(location.href).then(show).catch(() => location.reload());
+        });
+    })();
+    </script>"""
 
 
 class Docs:
@@ -96,6 +166,57 @@ class Docs:
                 """
             ),
         ] = None,
+        profile: Annotated[
+            bool,
+            Doc(
+                """
+                Record per-render phase timings, viewable at /_mkpy/profile.
+                """
+            ),
+        ] = False,
+        highlight: Annotated[
+            bool,
+            Doc(
+                """
+                Highlight fenced code blocks on the server with Pygments.
+                """
+            ),
+        ] = True,
+        instant_nav: Annotated[
+            bool,
+            Doc(
+                """
+                Navigate between pages by fetching content-only fragments
+                instead of reloading the whole page.
+                """
+            ),
+        ] = False,
+        show_toc: Annotated[
+            bool,
+            Doc(
+                """
+                Show a table of contents built from the page headings.
+                """
+            ),
+        ] = False,
+        git_ref: Annotated[
+            str | None,
+            Doc(
+                """
+                Serve the markdown files of a git ref (tag, branch or commit)
+                read from the repository's object store instead of the
+                working tree. ``folder`` is then relative to ``repo``.
+                """
+            ),
+        ] = None,
+        repo: Annotated[
+            str,
+            Doc(
+                """
+                Path to the local git repository used with ``git_ref``.
+                """
+            ),
+        ] = ".",
     ) -> None:
         """
         Initialize Docs instance.
@@ -109,8 +230,14 @@ class Docs:
             show_nav: Show navigation menu.
             custom_css: Custom CSS content or path to CSS file.
             custom_js: Custom JavaScript content or path to JS file.
+            profile: Enable render tracing.
+            highlight: Highlight code blocks.
+            instant_nav: Enable client-side navigation with fragments.
+            show_toc: Show a table of contents on each page.
+            git_ref: Git ref to read markdown files from.
+            repo: Git repository used with git_ref.
         """
-        self.folder = folder
+        self.folder = os.path.join(repo, folder) if git_ref else folder
         self.title = title
         self.theme = theme
         self.host = host
@@ -118,11 +245,31 @@ class Docs:
         self.show_nav = show_nav
         self.custom_css = custom_css
         self.custom_js = custom_js
+        self.highlight = highlight
+        self.instant_nav = instant_nav
+        self.show_toc = show_toc
+        self.git_ref = git_ref
 
         if theme not in THEMES:
             raise ValueError(f"Theme '{theme}' not found. Available: {list(THEMES.keys())}")
 
         self.routes: dict[str, str] = {}
+        self.base_path = ""
+        self.site_url: str | None = None
+        self.sitemap_max_urls = SITEMAP_MAX_URLS
+        self._routes_version = 0
+        self._sitemap_cache: dict[str, tuple[tuple[int, int], dict[str, bytes]]] = {}
+        self.pages = (
+            GitPageStore(repository(repo), git_ref) if git_ref else PageStore()
+        )
+        self.cache = RenderCache()
+        self.flights = SingleFlight()
+        self.prewarmer: Prewarmer | None = None
+        self._nav_cache: tuple[tuple[int, int, str], list[tuple[str, str]], str] | None = None
+        self._search_cache: tuple[tuple[int, int, str] | None, bytes] | None = None
+        self.metrics = Metrics()
+        self.limits = Limits()
+        self.profiler = Profiler(enabled=profile)
         self._auto_discover_assets()
         self._build_routes()
 
@@ -156,6 +303,13 @@ class Docs:
                     self.custom_js = auto_js
 
     def _build_routes(self) -> None:
+        if isinstance(self.pages, GitPageStore):
+            folder = os.path.relpath(os.path.realpath(self.folder), self.pages.repo.toplevel)
+            for relative, page_path in self.pages.load(folder.replace("\\", "/")):
+                self.routes[self._route(relative)] = page_path
+            self._routes_version += 1
+            return
+
         if not os.path.exists(self.folder):
             raise FileNotFoundError(f"Folder '{self.folder}' not found")
 
@@ -163,35 +317,131 @@ class Docs:
             for file in files:
                 if file.endswith(".md"):
                     full_path = os.path.join(root, file)
+                    route = self._route(os.path.relpath(full_path, self.folder))
+
+                    self.routes[route] = full_path
+                    self.pages.add(full_path)
 
-                    route = os.path.relpath(full_path, self.folder)
-                    route = route.replace("\\", "/")
-                    route = route.replace(".md", "")
+        self._routes_version += 1
 
-                    if route.endswith("index"):
-                        route = route[:-6] if route.endswith("/index") else route[:-5]
+    @staticmethod
+    def _route(relative: str) -> str:
+        """Map a markdown path relative to the docs folder to its route."""
+        route = relative.replace("\\", "/")
+        route = route.replace(".md", "")
 
-                    route = "/" + route.strip("/") if route != "/" else "/"
+        if route.endswith("index"):
+            route = route[:-6] if route.endswith("/index") else route[:-5]
 
-                    self.routes[route] = full_path
+        return "/" + route.strip("/") if route != "/" else "/"
 
     @property
     def navigation(self) -> list[tuple[str, str]]:
         """
         Build navigation from routes with smart title extraction.
 
-        Extracts title from first # heading in each markdown file,
-        or uses filename as fallback.
+        Titles come from front matter, the first # heading or the filename.
+        Pages are sorted by their front matter ``order``, then by route;
+        ``hidden`` pages are left out. Cached until a page changes.
+        """
+        return self._navigation()[0]
+
+    def _visible_routes(self) -> list[str]:
+        """Routes not marked hidden, in navigation order."""
+        entries = []
+        for route in self.routes:
+            meta = self.pages.meta(self.routes[route])
+            if not meta.hidden:
+                entries.append((meta.order is None, meta.order or 0, route))
+        return [route for _, _, route in sorted(entries)]
+
+    def _navigation(self) -> tuple[list[tuple[str, str]], str]:
+        key = (self.pages.scan(), self._routes_version, self.base_path)
+        cached = self._nav_cache
+        if cached is not None and cached[0] == key:
+            return cached[1], cached[2]
+
+        nav = [(route, self.pages.title(self.routes[route])) for route in self._visible_routes()]
+        links = " | ".join(
+            f'<a href="{self.base_path}{route}">{title}</a>' for route, title in nav
+        )
+        nav_html = f"""
+            <nav class="mkpy-nav">
+                {links}
+            </nav>
+            """
+        # titles just read may have re-validated records and bumped the generation
+        key = (self.pages.generation, self._routes_version, self.base_path)
+        self._nav_cache = (key, nav, nav_html)
+        return nav, nav_html
+
+    def search_index(self) -> bytes:
+        """
+        JSON search index of the visible pages, built from page metadata.
+
+        Each entry has the page url, title and headings with anchors.
+        Cached until a page changes.
+        """
+        nav = self._navigation()[0]
+        key = self._nav_cache[0] if self._nav_cache is not None else None
+        cached = self._search_cache
+        if cached is not None and cached[0] == key:
+            return cached[1]
+
+        entries = []
+        for route, title in nav:
+            headings = self.pages.headings(self.routes[route])
+            entries.append({
+                "url": self.base_path + route,
+                "title": title,
+                "headings": [
+                    {"text": text, "anchor": anchor}
+                    for level, text, anchor in headings
+                    if level > 1
+                ],
+            })
+        index = json.dumps(entries, ensure_ascii=False).encode("utf-8")
+        self._search_cache = (key, index)
+        return index
+
+    def _toc_html(self, file_path: str) -> str:
+        """Table of contents of a page, cached alongside its rendered content."""
+        if not self.show_toc:
+            return ""
+        key = (*self.pages.cache_key(self.pages.get(file_path)), "toc")
+        toc_html = self.cache.get(key)
+        if toc_html is not None:
+            return toc_html
+        items = "".join(
+            f'<li class="mkpy-toc-{level}"><a href="#{anchor}">{html.escape(text)}</a></li>'
+            for level, text, anchor in toc_entries(self.pages.headings(file_path))
+        )
+        toc_html = f'<nav class="mkpy-toc"><ul>{items}</ul></nav>\n' if items else ""
+        self.cache.put(key, toc_html)
+        return toc_html
+
+    def static_file(self, path: str) -> str | None:
         """
-        nav = []
-        for route in sorted(self.routes.keys()):
-            file_path = self.routes[route]
-            with open(file_path, "r", encoding="utf-8") as f:
-                md = f.read()
-            filename = os.path.basename(file_path)
-            title = extract_title(md, filename)
-            nav.append((route, title))
-        return nav
+        Find a static file for a URL path.
+
+        Looks in the static/ folder next to the docs folder, then in
+        ./static and ./assets.
+
+        Args:
+            path: URL path relative to the site root.
+
+        Returns:
+            File path, or None if no static file matches.
+        """
+        static_folder = os.path.join(self.folder, "..", "static")
+
+        for static_base in [static_folder, "static", "assets"]:
+            if os.path.isdir(static_base):
+                file_path = os.path.join(static_base, path.lstrip("/"))
+                if os.path.isfile(file_path):
+                    return file_path
+
+        return None
 
     def _load_custom_asset(self, value: str | None, asset_type: str) -> str:
         if value is None:
@@ -217,6 +467,71 @@ class Docs:
 
         return value
 
+    def _render_content(self, file_path: str) -> tuple[str, float, float]:
+        started = time.perf_counter()
+        record = self.pages.get(file_path)
+        key = (*self.pages.cache_key(record), self.highlight)
+        content = self.cache.get(key)
+        if content is not None:
+            self.metrics.inc("mkpy_render_cache_total", result="hit")
+            return content, time.perf_counter() - started, 0.0
+
+        (content, read_time, markdown_time), shared = self.flights.do(
+            key, lambda: self._convert(file_path, key, started)
+        )
+        if shared:
+            self.metrics.inc("mkpy_render_cache_total", result="shared")
+            return content, time.perf_counter() - started, 0.0
+        return content, read_time, markdown_time
+
+    def _convert(self, file_path: str, key: tuple, started: float) -> tuple[str, float, float]:
+        """
+        Convert a page for the single-flight leader and store it in the cache.
+
+        Only this step takes one of ``limits.max_renders`` render slots.
+        """
+        if key in self.cache:
+            # finished by a previous flight between our lookup and this call
+            content = self.cache.get(key)
+            if content is not None:
+                return content, time.perf_counter() - started, 0.0
+
+        with self.limits.render_slot():
+            md, version = self.pages.read(file_path)
+            read = time.perf_counter()
+            content = render_markdown(md, highlight=self.highlight)
+        # keyed by the version that was read: a save during conversion must
+        # not be cached with the old content
+        self.cache.put((*version, self.highlight), content)
+        converted = time.perf_counter()
+        self.metrics.inc("mkpy_render_cache_total", result="miss")
+        self.metrics.observe("mkpy_render_duration_seconds", converted - read, phase="markdown")
+        return content, read - started, converted - read
+
+    def render_content(self, file_path: str) -> str:
+        """
+        Convert a markdown file to HTML without the page layout.
+
+        Args:
+            file_path: Path to markdown file.
+
+        Returns:
+            Converted markdown, served from the render cache when possible.
+        """
+        return self._render_content(file_path)[0]
+
+    def render_fragment(self, file_path: str) -> str:
+        """
+        Render the inner HTML of a page's <main>: table of contents and content.
+
+        Args:
+            file_path: Path to markdown file.
+
+        Returns:
+            HTML fragment used for instant navigation.
+        """
+        return self._toc_html(file_path) + self.render_content(file_path)
+
     def render(self, file_path: str) -> str:
         """
         Render a markdown file to full HTML page.
@@ -227,27 +542,21 @@ class Docs:
         Returns:
             Complete HTML page string.
         """
-        with open(file_path, "r", encoding="utf-8") as f:
-            md = f.read()
+        content, read_time, markdown_time = self._render_content(file_path)
+        content = self._toc_html(file_path) + content
+        converted = time.perf_counter()
+
+        nav_html = self._navigation()[1] if self.show_nav else ""
+        navigated = time.perf_counter()
 
-        content = render_markdown(md)
         base_css = THEMES[self.theme]
         custom_css = self._load_custom_asset(self.custom_css, "css")
-
-        nav_html = ""
-        if self.show_nav:
-            nav_items = []
-            for route, title in self.navigation:
-                nav_items.append(f'<a href="{route}">{title}</a>')
-            nav_html = f"""
-            <nav class="mkpy-nav">
-                {" | ".join(nav_items)}
-            </nav>
-            """
+        custom_js = self._load_custom_asset(self.custom_js, "js")
+        loaded = time.perf_counter()
 
         custom_css_block = f"<style>\n{custom_css}\n</style>" if custom_css else ""
 
-        return f"""<!DOCTYPE html>
+        page = f"""<!DOCTYPE html>
 <html>
 <head>
     <meta charset="UTF-8">
@@ -255,6 +564,7 @@ class Docs:
     <title>{self.title}</title>
     <style>
     {base_css}
+    {highlight_css(self.theme) if self.highlight else ""}
     .mkpy-nav {{
         margin-bottom: 2em;
         padding-bottom: 1em;
@@ -264,6 +574,13 @@ class Docs:
         margin-right: 1em;
         color: {'#58a6ff' if self.theme == 'dark' else '#0066cc'};
     }}
+    .mkpy-toc ul {{
+        list-style: none;
+        padding-left: 0;
+    }}
+    .mkpy-toc-3 {{
+        margin-left: 1.5em;
+    }}
     </style>
     {custom_css_block}
 </head>
@@ -296,10 +613,21 @@ class Docs:
         }}
     }});
     </script>
-    {self._load_custom_asset(self.custom_js, 'js')}
+    {INSTANT_NAV_SCRIPT % html.escape(self.base_path) if self.instant_nav else ""}
+    {custom_js}
 </body>
 </html>
 """
+        finished = time.perf_counter()
+        self.metrics.observe("mkpy_render_duration_seconds", finished - converted, phase="template")
+        if self.profiler.enabled:
+            with self.profiler.trace(file_path):
+                self.profiler.record("read", read_time)
+                self.profiler.record("markdown", markdown_time)
+                self.profiler.record("navigation", navigated - converted)
+                self.profiler.record("assets", loaded - navigated)
+                self.profiler.record("template", finished - loaded)
+        return page
 
     def render_error(self, code: int, message: str) -> str:
         """
@@ -342,10 +670,53 @@ class Docs:
     <div class="error-container">
         <div class="error-code">{code}</div>
         <div class="error-message">{message}</div>
-        <p><a href="/">← Back to home</a></p>
+        <p><a href="{self.base_path}/">← Back to home</a></p>
     </div>
 </body>
 </html>
+"""
+
+    def render_profile(self, limit: int = 50) -> str:
+        """
+        Render the profiler report: slowest routes with mean phase timings.
+
+        Args:
+            limit: Maximum number of routes to list.
+
+        Returns:
+            HTML page string.
+        """
+        css = THEMES[self.theme]
+        header = "".join(f"<th>{name} (ms)</th>" for name in PHASES)
+        rows = []
+        for row in self.profiler.slowest(limit):
+            phases = "".join(
+                f"<td>{row['phases'][name] * 1000:.2f}</td>" for name in PHASES
+            )
+            rows.append(
+                f"<tr><td>{html.escape(row['route'])}</td><td>{row['count']}</td>"
+                f"<td>{row['mean'] * 1000:.2f}</td><td>{row['max'] * 1000:.2f}</td>{phases}</tr>"
+            )
+        return f"""<!DOCTYPE html>
+<html>
+<head>
+    <meta charset="UTF-8">
+    <title>Profile - {self.title}</title>
+    <style>
+    {css}
+    body {{ max-width: none; }}
+    td, th {{ font-variant-numeric: tabular-nums; }}
+    </style>
+</head>
+<body>
+    <h1>Slowest routes</h1>
+    <p>{len(self.profiler.traces)} traces buffered</p>
+    <table>
+        <tr><th>Route</th><th>Count</th><th>Mean (ms)</th><th>Max (ms)</th>{header}</tr>
+        {"".join(rows)}
+    </table>
+</body>
+</html>
 """
 
     def generate_sitemap(self, host: Annotated[
@@ -363,13 +734,89 @@ class Docs:
             host: Base URL of the documentation site.
 
         Returns:
-            XML sitemap string.
+            XML sitemap string. For sites larger than ``sitemap_max_urls``
+            this is a sitemap index; see ``sitemap_files`` for the shards.
+        """
+        return self.sitemap_files(host)["sitemap.xml"].decode("utf-8")
+
+    def sitemap_files(self, host: str = "http://localhost") -> dict[str, bytes]:
+        """
+        Return encoded sitemap files, cached until routes or pages change.
+
+        Pages marked ``hidden`` in their front matter are left out.
+
+        Args:
+            host: Base URL of the documentation site.
+
+        Returns:
+            Mapping of file name (sitemap.xml, sitemap-N.xml) to XML bytes.
+        """
+        key = (self.pages.scan(), self._routes_version)
+        cached = self._sitemap_cache.get(host)
+        if cached is not None and cached[0] == key:
+            return cached[1]
+
+        entries = []
+        for route in sorted(self._visible_routes()):
+            record = self.pages.get(self.routes[route])
+            entries.append((route, record.mtime / 1e9 if record.size >= 0 else None))
+        files = build_sitemaps(entries, host, self.sitemap_max_urls)
+        # metadata just scanned may have re-validated records and bumped the generation
+        key = (self.pages.generation, self._routes_version)
+        self._sitemap_cache[host] = (key, files)
+        return files
+
+    @property
+    def base_url(self) -> str:
+        """Absolute URL of the site root, used for sitemaps."""
+        return (self.site_url or f"http://{self.host}:{self.port}") + self.base_path
+
+    def memory_usage(self) -> int:
+        """
+        Approximate memory held by this site, in bytes.
+
+        Counts routes, page records, this site's render cache entries,
+        cached navigation and sitemaps, and custom assets; the shared
+        markdown engine is not included.
+        """
+        size = sys.getsizeof(self.routes) + sys.getsizeof(self.pages.records)
+        for route, path in self.routes.items():
+            size += sys.getsizeof(route) + sys.getsizeof(path)
+        for record in self.pages.records.values():
+            size += sys.getsizeof(record) + sys.getsizeof(record.mtime)
+            if record.meta is not None:
+                size += sys.getsizeof(record.meta) + sys.getsizeof(record.meta.title)
+        size += self.cache.memory_usage(self.pages.owns)
+        if self._nav_cache is not None:
+            _, nav, nav_html = self._nav_cache
+            size += sys.getsizeof(nav_html) + sum(sys.getsizeof(t) for _, t in nav)
+        for _, files in self._sitemap_cache.values():
+            size += sum(sys.getsizeof(content) for content in files.values())
+        for asset in (self.custom_css, self.custom_js):
+            if asset:
+                size += sys.getsizeof(asset)
+        return size
+
+    def prewarm(
+        self,
+        routes: list[str] | None = None,
+        workers: int = 2,
+    ) -> Prewarmer:
+        """
+        Render pages into the cache in background threads.
+
+        Args:
+            routes: Routes in priority order; defaults to all routes.
+            workers: Number of background threads.
+
+        Returns:
+            The started Prewarmer.
         """
-        urls = []
-        for route in sorted(self.routes.keys()):
-            url = f"{host}{route}"
-            urls.append(f"  <url>\n    <loc>{url}</loc>\n  </url>")
-        return '<?xml version="1.0" encoding="UTF-8"?>\n<urlset xmlns="http://www.sitemaps.org/schemas/sitemap/0.9">\n' + "\n".join(urls) + "\n</urlset>"
+        if routes is None:
+            routes = sorted(self.routes)
+        self.prewarmer = Prewarmer(self, routes, workers=workers)
+        self.prewarmer.start()
+        return self.prewarmer
 
     def run(self) -> None:
         run_server(self)
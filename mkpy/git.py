@@ -0,0 +1,176 @@
+"""Reading documentation sources straight from a git object store."""
+
+from __future__ import annotations
+
+import os
+import subprocess
+import threading
+from collections.abc import Hashable
+from typing import Callable
+
+from .pages import PageRecord, PageStore, T
+
+
+class GitRepository:
+    """
+    Read-only access to a local repository through git plumbing.
+
+    Blobs are read from one long-running ``git cat-file --batch`` process,
+    so no checkout is needed and one repository can be shared by the Docs
+    instances of several versions.
+    """
+
+    def __init__(self, path: str = ".") -> None:
+        self.path = os.path.abspath(path)
+        self.toplevel = os.path.realpath(
+            self._git("rev-parse", "--show-toplevel").decode().strip()
+        )
+        self._batch: subprocess.Popen | None = None
+        self._lock = threading.Lock()
+
+    def _git(self, *args: str) -> bytes:
+        try:
+            result = subprocess.run(
+                ["git", "-C", self.path, *args], capture_output=True, check=True
+            )
+        except FileNotFoundError as error:
+            raise RuntimeError("git executable not found") from error
+        except subprocess.CalledProcessError as error:
+            message = error.stderr.decode("utf-8", "replace").strip()
+            raise ValueError(f"git {args[0]} failed: {message}") from error
+        return result.stdout
+
+    def resolve(self, ref: str) -> str:
+        """Return the commit id a ref (tag, branch or sha) points to."""
+        try:
+            commit = self._git("rev-parse", "--verify", "--quiet", f"{ref}^{{commit}}")
+        except ValueError:
+            raise ValueError(f"Unknown git ref '{ref}'") from None
+        return commit.decode().strip()
+
+    def commit_time(self, commit: str) -> int:
+        """Committer time of a commit, in seconds since the epoch."""
+        return int(self._git("show", "-s", "--format=%ct", commit).decode().strip())
+
+    def tree(self, commit: str, folder: str) -> list[tuple[str, str, int]]:
+        """
+        List the blobs below a folder of a commit.
+
+        Args:
+            commit: Commit id.
+            folder: Folder relative to the repository root.
+
+        Returns:
+            (path relative to the folder, blob id, size) triples.
+        """
+        prefix = folder.strip("/") + "/" if folder.strip("/.") else ""
+        output = self._git("ls-tree", "-r", "-l", "-z", "--full-tree", commit, "--", prefix or ".")
+        blobs = []
+        for entry in output.split(b"\0"):
+            if not entry:
+                continue
+            info, _, path = entry.partition(b"\t")
+            _, kind, blob, size = info.split()
+            if kind == b"blob":
+                name = path.decode("utf-8", "surrogateescape")
+                blobs.append((name[len(prefix):], blob.decode(), int(size)))
+        return blobs
+
+    def read(self, blob: str) -> bytes:
+        """Read a blob through the shared ``git cat-file --batch`` process."""
+        with self._lock:
+            if self._batch is None or self._batch.poll() is not None:
+                self._batch = subprocess.Popen(
+                    ["git", "-C", self.path, "cat-file", "--batch"],
+                    stdin=subprocess.PIPE,
+                    stdout=subprocess.PIPE,
+                )
+            stdin, stdout = self._batch.stdin, self._batch.stdout
+            assert stdin is not None and stdout is not None
+            stdin.write(blob.encode() + b"\n")
+            stdin.flush()
+            header = stdout.readline().split()
+            if len(header) != 3:
+                raise FileNotFoundError(f"Object '{blob}' not found")
+            data = stdout.read(int(header[2]))
+            stdout.read(1)
+            return data
+
+    def close(self) -> None:
+        with self._lock:
+            if self._batch is not None:
+                self._batch.stdin.close()  # type: ignore[union-attr]
+                self._batch.wait()
+                self._batch = None
+
+
+_repositories: dict[str, GitRepository] = {}
+_repositories_lock = threading.Lock()
+
+
+def repository(path: str = ".") -> GitRepository:
+    """Return the shared GitRepository for a path."""
+    key = os.path.realpath(path)
+    with _repositories_lock:
+        repo = _repositories.get(key)
+        if repo is None:
+            repo = _repositories[key] = GitRepository(path)
+        return repo
+
+
+class GitPageStore(PageStore):
+    """
+    Page records for the markdown files of one git commit.
+
+    A commit never changes, so records are not re-validated. Pages are
+    identified by their blob id, which makes render cache entries shared
+    between versions whose page is unchanged.
+    """
+
+    def __init__(self, repo: GitRepository, ref: str) -> None:
+        super().__init__()
+        self.repo = repo
+        self.ref = ref
+        self.commit = repo.resolve(ref)
+        self.mtime = repo.commit_time(self.commit) * 1_000_000_000
+        self.blobs: dict[str, str] = {}
+        self._blob_ids: set[str] = set()
+
+    def load(self, folder: str) -> list[tuple[str, str]]:
+        """
+        Register the markdown files below a folder of the commit.
+
+        Args:
+            folder: Folder relative to the repository root.
+
+        Returns:
+            (path relative to the folder, page path) pairs; page paths
+            look like "v1.4:docs/guide.md".
+        """
+        pages = []
+        base = folder.strip("/") if folder.strip("/.") else ""
+        for relative, blob, size in self.repo.tree(self.commit, base):
+            if not relative.endswith(".md"):
+                continue
+            path = f"{self.ref}:{base}/{relative}" if base else f"{self.ref}:{relative}"
+            record = self.add(path)
+            record.size, record.mtime = size, self.mtime
+            self.blobs[path] = blob
+            self._blob_ids.add(blob)
+            pages.append((relative, path))
+        return pages
+
+    def _refresh(self, record: PageRecord) -> bool:
+        return False
+
+    def cache_key(self, record: PageRecord) -> tuple:
+        return ("blob", self.blobs.get(record.path))
+
+    def owns(self, key: Hashable) -> bool:
+        return isinstance(key, tuple) and key[0] == "blob" and key[1] in self._blob_ids
+
+    def _inspect(self, record: PageRecord, scan: Callable[[bytes], T]) -> tuple[T, tuple]:
+        blob = self.blobs.get(record.path)
+        if blob is None:
+            raise FileNotFoundError(f"File '{record.path}' not found")
+        return scan(self.repo.read(blob)), ("blob", blob)
@@ -0,0 +1,137 @@
+"""Internal link graph and broken-link checking."""
+
+from __future__ import annotations
+
+import json
+import os
+import re
+from html import unescape
+from typing import Callable
+from urllib.parse import unquote, urljoin, urlsplit
+
+HREF_PATTERN = re.compile(r"<a\s[^>]*?\bhref\s*=\s*[\"']([^\"']*)[\"']", re.IGNORECASE)
+
+GENERATED_PATHS = {"/sitemap.xml", "/404.html", "/_mkpy/search.json"}
+
+
+def extract_links(html: str) -> list[str]:
+    """Return the raw href values of all anchors in an HTML fragment."""
+    return [unescape(href) for href in HREF_PATTERN.findall(html)]
+
+
+def resolve_link(href: str, route: str) -> str | None:
+    """
+    Resolve an href found on a page to an internal path.
+
+    Args:
+        href: Link target as written in the HTML.
+        route: Route of the page containing the link.
+
+    Returns:
+        Normalized path, or None for external links and same-page anchors.
+    """
+    href = href.strip()
+    if not href or href.startswith("#"):
+        return None
+    parts = urlsplit(href)
+    if parts.scheme or parts.netloc:
+        return None
+    target = urlsplit(urljoin(f"http://mkpy{route}", href)).path
+    return unquote(target).rstrip("/") or "/"
+
+
+class LinkGraph:
+    """
+    Internal links between pages, indexed by route.
+
+    Outgoing links are stored per page together with the page version
+    they were extracted from, so a rebuild only re-extracts changed pages.
+    Validation against the current routes is a set lookup per edge.
+    """
+
+    def __init__(self) -> None:
+        self.outgoing: dict[str, list[str]] = {}
+        self.versions: dict[str, list] = {}
+
+    def is_current(self, route: str, version: tuple) -> bool:
+        """Whether links for this page version are already known."""
+        return self.versions.get(route) == list(version)
+
+    def update(self, route: str, version: tuple, html: Callable[[], str]) -> bool:
+        """
+        Record the links of a page unless this version was already indexed.
+
+        Args:
+            route: Page route.
+            version: Page version, e.g. (path, mtime_ns, size).
+            html: Callable returning the page content HTML; only called
+                when the page changed.
+
+        Returns:
+            True if the page was (re-)indexed.
+        """
+        if self.is_current(route, version):
+            return False
+        targets = []
+        for href in extract_links(html()):
+            target = resolve_link(href, route)
+            if target is not None and target != route:
+                targets.append(target)
+        self.outgoing[route] = sorted(set(targets))
+        self.versions[route] = list(version)
+        return True
+
+    def prune(self, routes: set[str]) -> None:
+        """Forget pages that no longer exist."""
+        for route in list(self.outgoing):
+            if route not in routes:
+                del self.outgoing[route]
+                self.versions.pop(route, None)
+
+    def broken(
+        self,
+        routes: set[str],
+        exists: Callable[[str], bool] | None = None,
+    ) -> list[tuple[str, str]]:
+        """
+        Find links pointing at neither a route nor an existing file.
+
+        Args:
+            routes: Current routes of the site.
+            exists: Extra check for non-route targets such as static files.
+
+        Returns:
+            Sorted (source route, target) pairs.
+        """
+        broken = []
+        for source, targets in self.outgoing.items():
+            for target in targets:
+                if target in routes or target in GENERATED_PATHS:
+                    continue
+                if exists is not None and exists(target):
+                    continue
+                broken.append((source, target))
+        return sorted(broken)
+
+    def orphans(self, routes: set[str]) -> list[str]:
+        """Routes no other page links to (the home page is never an orphan)."""
+        linked = {target for targets in self.outgoing.values() for target in targets}
+        return sorted(route for route in routes if route != "/" and route not in linked)
+
+    def save(self, file_path: str) -> None:
+        os.makedirs(os.path.dirname(file_path), exist_ok=True)
+        with open(file_path, "w", encoding="utf-8") as f:
+            json.dump({"outgoing": self.outgoing, "versions": self.versions}, f)
+
+    @classmethod
+    def load(cls, file_path: str) -> LinkGraph:
+        """Load a saved graph; a missing or unreadable file gives an empty graph."""
+        graph = cls()
+        try:
+            with open(file_path, encoding="utf-8") as f:
+                data = json.load(f)
+            graph.outgoing = data["outgoing"]
+            graph.versions = data["versions"]
+        except (OSError, ValueError, KeyError):
+            pass
+        return graph
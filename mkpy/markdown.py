@@ -2,7 +2,15 @@
 
 from __future__ import annotations
 
+import functools
+import hashlib
 import re
+import threading
+from html import unescape
+
+from .cache import RenderCache
+
+_local = threading.local()
 
 
 def extract_title(md: str, filename: str) -> str:
@@ -51,20 +59,112 @@ def extract_headings(md: str, max_level: int = 3) -> list[tuple[int, str, str]]:
     return headings
 
 
-def render(md: str) -> str:
+CODE_BLOCK_PATTERN = re.compile(
+    r'<pre><code class="language-([\w+#.-]+)">(.*?)</code></pre>', re.DOTALL
+)
+
+HIGHLIGHT_STYLES = {"light": "default", "dark": "monokai"}
+
+_highlighted = RenderCache(max_entries=8192)
+
+
+def highlight_code(language: str, code: str) -> str | None:
+    """
+    Highlight a code snippet with Pygments, memoized by (language, code hash).
+
+    Args:
+        language: Language name from the code fence.
+        code: Raw (unescaped) source code.
+
+    Returns:
+        Highlighted HTML, or None if Pygments is missing or the language is unknown.
+    """
+    key = (language, hashlib.blake2b(code.encode("utf-8"), digest_size=16).digest())
+    cached = _highlighted.get(key)
+    if cached is not None:
+        return cached or None
+
+    try:
+        from pygments import highlight
+        from pygments.formatters import HtmlFormatter
+        from pygments.lexers import get_lexer_by_name
+        from pygments.util import ClassNotFound
+    except ImportError:
+        return None
+
+    try:
+        lexer = get_lexer_by_name(language)
+    except ClassNotFound:
+        result = ""
+    else:
+        result = highlight(code, lexer, HtmlFormatter(cssclass="highlight", wrapcode=True))
+    _highlighted.put(key, result)
+    return result or None
+
+
+@functools.cache
+def highlight_css(theme: str) -> str:
+    """Pygments CSS for a theme, or an empty string without Pygments."""
+    try:
+        from pygments.formatters import HtmlFormatter
+    except ImportError:
+        return ""
+    style = HIGHLIGHT_STYLES.get(theme, "default")
+    css: str = HtmlFormatter(style=style, cssclass="highlight").get_style_defs(".highlight")
+    return css
+
+
+def _highlight_blocks(html: str) -> str:
+    def replace(match: re.Match[str]) -> str:
+        highlighted = highlight_code(match.group(1), unescape(match.group(2)))
+        return highlighted if highlighted is not None else match.group(0)
+
+    return CODE_BLOCK_PATTERN.sub(replace, html)
+
+
+def _engine(highlight: bool):
+    """
+    Return this thread's Markdown instance.
+
+    Building the extension pipeline is far more expensive than a reset,
+    so one engine per thread is shared by every Docs instance.
+    """
+    engines = getattr(_local, "engines", None)
+    if engines is None:
+        engines = _local.engines = {}
+    engine = engines.get(highlight)
+    if engine is None:
+        import markdown
+        from markdown.postprocessors import Postprocessor
+
+        engine = engines[highlight] = markdown.Markdown(
+            extensions=["extra", "tables", "fenced_code", "toc"],
+            output_format="html5",
+        )
+        if highlight:
+
+            class Highlighter(Postprocessor):
+                def run(self, text: str) -> str:
+                    return _highlight_blocks(text)
+
+            # runs after raw HTML (where fenced blocks are stashed) is restored
+            engine.postprocessors.register(Highlighter(engine), "mkpy_highlight", 10)
+    return engine
+
+
+def render(md: str, highlight: bool = False) -> str:
     """
     Render markdown to HTML.
 
     Args:
         md: Raw markdown content.
+        highlight: Highlight fenced code blocks with Pygments.
 
     Returns:
         Rendered HTML string.
     """
-    import markdown
-
-    return markdown.markdown(
-        md,
-        extensions=["extra", "tables", "fenced_code", "toc"],
-        output_format="html5",
-    )
+    engine = _engine(highlight)
+    try:
+        return engine.convert(md)
+    finally:
+        engine.reset()
@@ -0,0 +1,159 @@
+"""Page metadata: front matter, title and headings."""
+
+from __future__ import annotations
+
+import re
+
+from .markdown import extract_title
+
+FRONT_MATTER_LIMIT = 4096
+
+FRONT_MATTER_PATTERN = re.compile(
+    rb"\A---[ \t]*\r?\n(.*?)^---[ \t]*(?:\r?\n|\Z)", re.DOTALL | re.MULTILINE
+)
+FIELD_PATTERN = re.compile(r"^([A-Za-z_][\w-]*)[ \t]*:[ \t]*(.*?)[ \t]*$")
+LINE_PATTERN = re.compile(
+    rb"^(?:[ \t]{0,3}(`{3,}|~{3,})[^\r\n]*|(#{1,6})[ \t]+(.+?)[ \t]*)\r?$", re.MULTILINE
+)
+CLOSING_HASHES = re.compile(r"[ \t]+#+$")
+
+TOC_MAX_LEVEL = 3
+
+
+class PageMeta:
+    """
+    Metadata kept in memory for one page.
+
+    Only what navigation and the sitemap need for every page is stored;
+    headings are scanned on demand with ``scan_headings``.
+    ``body_offset`` is the byte offset after the front matter.
+    """
+
+    __slots__ = ("title", "order", "hidden", "body_offset")
+
+    def __init__(
+        self,
+        title: str,
+        order: int | None = None,
+        hidden: bool = False,
+        body_offset: int = 0,
+    ) -> None:
+        self.title = title
+        self.order = order
+        self.hidden = hidden
+        self.body_offset = body_offset
+
+
+def toc_entries(headings: list[tuple[int, str, str]]) -> list[tuple[int, str, str]]:
+    """Headings below the page title, down to TOC_MAX_LEVEL."""
+    return [h for h in headings if 1 < h[0] <= TOC_MAX_LEVEL]
+
+
+def _value(raw: str) -> str | int | bool:
+    if len(raw) >= 2 and raw[0] == raw[-1] and raw[0] in "\"'":
+        return raw[1:-1]
+    lowered = raw.lower()
+    if lowered in ("true", "yes", "on"):
+        return True
+    if lowered in ("false", "no", "off"):
+        return False
+    if re.fullmatch(r"[+-]?\d+", raw):
+        return int(raw)
+    return raw
+
+
+def parse_front_matter(text: str) -> dict[str, str | int | bool]:
+    """
+    Parse the flat ``key: value`` subset of YAML used in front matter.
+
+    Quoted values are strings, true/false/yes/no are booleans and
+    integers are converted; comments and blank lines are ignored.
+    """
+    fields: dict[str, str | int | bool] = {}
+    for line in text.splitlines():
+        if not line.strip() or line.lstrip().startswith("#"):
+            continue
+        match = FIELD_PATTERN.match(line)
+        if match:
+            fields[match.group(1).lower()] = _value(match.group(2))
+    return fields
+
+
+def _slugs():
+    from markdown.extensions.toc import slugify, unique
+
+    used: set[str] = set()
+    return lambda text: unique(slugify(text, "-"), used)
+
+
+def _iter_headings(data: bytes, start: int):
+    """Yield (level, text) for headings outside fenced code, in one regex pass."""
+    fence = b""
+    for line in LINE_PATTERN.finditer(data, start):
+        marker = line.group(1)
+        if marker:
+            if not fence:
+                fence = marker
+            elif marker[:1] == fence[:1] and len(marker) >= len(fence):
+                fence = b""
+            continue
+        if fence:
+            continue
+        text = CLOSING_HASHES.sub("", line.group(3).decode("utf-8", "replace"))
+        text = text.replace("`", "").strip()
+        if text:
+            yield len(line.group(2)), text
+
+
+def scan_headings(data: bytes, start: int = 0) -> list[tuple[int, str, str]]:
+    """
+    Find all headings of a page with their anchors.
+
+    Anchors match the ids the markdown toc extension assigns.
+
+    Args:
+        data: File contents, e.g. bytes or an mmap.
+        start: Offset where the markdown body starts.
+
+    Returns:
+        (level, text, anchor) triples in document order.
+    """
+    slug = _slugs()
+    return [(level, text, slug(text)) for level, text in _iter_headings(data, start)]
+
+
+def scan_metadata(data: bytes, filename: str) -> PageMeta:
+    """
+    Extract page metadata from raw file contents.
+
+    Front matter is only looked for in the first FRONT_MATTER_LIMIT
+    bytes, and without a front matter title the scan stops at the first
+    ``# `` heading outside fenced code.
+
+    Args:
+        data: File contents, e.g. bytes or an mmap.
+        filename: File name used for the fallback title.
+
+    Returns:
+        Page metadata.
+    """
+    fields: dict[str, str | int | bool] = {}
+    body_offset = 0
+    match = FRONT_MATTER_PATTERN.match(data[:FRONT_MATTER_LIMIT])
+    if match:
+        fields = parse_front_matter(match.group(1).decode("utf-8", "replace"))
+        body_offset = match.end()
+
+    title = fields.get("title")
+    if not isinstance(title, str) or not title:
+        first = next(
+            (text for level, text in _iter_headings(data, body_offset) if level == 1), ""
+        )
+        title = extract_title(f"# {first}" if first else "", filename)
+    order = fields.get("order")
+    return PageMeta(
+        title=title,
+        order=order if isinstance(order, int) and not isinstance(order, bool) else None,
+        hidden=fields.get("hidden") is True,
+        body_offset=body_offset,
+    )
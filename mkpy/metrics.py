@@ -0,0 +1,128 @@
+"""Prometheus-style metrics for mkpy."""
+
+from __future__ import annotations
+
+import bisect
+import threading
+
+DEFAULT_BUCKETS: tuple[float, ...] = (
+    0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0,
+)
+
+METRICS: dict[str, tuple[str, str]] = {
+    "mkpy_http_requests_total": ("counter", "HTTP requests by route and status code."),
+    "mkpy_http_request_duration_seconds": ("histogram", "HTTP request handling time."),
+    "mkpy_render_duration_seconds": ("histogram", "Page render time by phase."),
+    "mkpy_render_cache_total": ("counter", "Render cache lookups by result."),
+    "mkpy_static_bytes_total": ("counter", "Bytes of static files served."),
+    "mkpy_open_connections": ("gauge", "Currently open client connections."),
+    "mkpy_rejected_requests_total": ("counter", "Requests answered 503 by reason."),
+    "mkpy_site_memory_bytes": ("gauge", "Approximate memory held per mounted site."),
+}
+
+LabelKey = tuple[tuple[str, str], ...]
+
+
+def _escape(value: str) -> str:
+    return value.replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def _format_labels(labels: LabelKey, extra: str = "") -> str:
+    parts = [f'{name}="{_escape(value)}"' for name, value in labels]
+    if extra:
+        parts.append(extra)
+    return "{" + ",".join(parts) + "}" if parts else ""
+
+
+def _format_value(value: float) -> str:
+    if value == int(value):
+        return str(int(value))
+    return repr(value)
+
+
+class Metrics:
+    """
+    Thread-safe counters, gauges and histograms.
+
+    Updates are a dict lookup and an addition under a lock, so the
+    instrumentation is cheap enough to stay enabled in production.
+    Output follows the Prometheus text exposition format.
+    """
+
+    def __init__(self, buckets: tuple[float, ...] = DEFAULT_BUCKETS) -> None:
+        self.buckets = tuple(sorted(buckets))
+        self._lock = threading.Lock()
+        self._counters: dict[tuple[str, LabelKey], float] = {}
+        self._gauges: dict[tuple[str, LabelKey], float] = {}
+        self._histograms: dict[tuple[str, LabelKey], list[float]] = {}
+
+    def inc(self, name: str, value: float = 1, **labels: str) -> None:
+        """Increase a counter."""
+        key = (name, tuple(labels.items()))
+        with self._lock:
+            self._counters[key] = self._counters.get(key, 0) + value
+
+    def add(self, name: str, value: float, **labels: str) -> None:
+        """Add a (possibly negative) delta to a gauge."""
+        key = (name, tuple(labels.items()))
+        with self._lock:
+            self._gauges[key] = self._gauges.get(key, 0) + value
+
+    def set(self, name: str, value: float, **labels: str) -> None:
+        """Set a gauge to an absolute value."""
+        key = (name, tuple(labels.items()))
+        with self._lock:
+            self._gauges[key] = value
+
+    def observe(self, name: str, value: float, **labels: str) -> None:
+        """Record a value in a histogram."""
+        key = (name, tuple(labels.items()))
+        index = bisect.bisect_left(self.buckets, value)
+        with self._lock:
+            hist = self._histograms.get(key)
+            if hist is None:
+                # one slot per bucket, then +Inf, sum and count
+                hist = self._histograms[key] = [0.0] * (len(self.buckets) + 3)
+            hist[index] += 1
+            hist[-2] += value
+            hist[-1] += 1
+
+    def value(self, name: str, **labels: str) -> float:
+        """Return the current value of a counter or gauge (0 if unset)."""
+        key = (name, tuple(labels.items()))
+        with self._lock:
+            return self._counters.get(key, self._gauges.get(key, 0))
+
+    def exposition(self) -> str:
+        """
+        Render all metrics in Prometheus text format.
+
+        Returns:
+            Exposition text, one sample per line.
+        """
+        with self._lock:
+            samples: dict[str, list[tuple[LabelKey, float | list[float]]]] = {}
+            for store in (self._counters, self._gauges):
+                for (name, labels), number in store.items():
+                    samples.setdefault(name, []).append((labels, number))
+            for (name, labels), hist in self._histograms.items():
+                samples.setdefault(name, []).append((labels, list(hist)))
+
+        lines = []
+        for name in sorted(samples):
+            kind, help_text = METRICS.get(name, ("untyped", name))
+            lines.append(f"# HELP {name} {help_text}")
+            lines.append(f"# TYPE {name} {kind}")
+            for labels, value in sorted(samples[name], key=lambda s: s[0]):
+                if isinstance(value, list):
+                    cumulative = 0.0
+                    for bound, count in zip(self.buckets + (float("inf"),), value):
+                        cumulative += count
+                        le = "+Inf" if bound == float("inf") else repr(bound)
+                        bucket_labels = _format_labels(labels, f'le="{le}"')
+                        lines.append(f"{name}_bucket{bucket_labels} {_format_value(cumulative)}")
+                    lines.append(f"{name}_sum{_format_labels(labels)} {repr(value[-2])}")
+                    lines.append(f"{name}_count{_format_labels(labels)} {_format_value(value[-1])}")
+                else:
+                    lines.append(f"{name}{_format_labels(labels)} {_format_value(value)}")
+        return "\n".join(lines) + "\n"
@@ -0,0 +1,165 @@
+"""Staged, atomically swapped build output."""
+
+from __future__ import annotations
+
+import os
+import secrets
+import shutil
+
+
+class BuildOutput:
+    """
+    Build output written to a fresh release directory and swapped into place.
+
+    The output path is a symlink to a release directory under a hidden
+    sibling (``.site.builds/``). Each build writes a new release and then
+    replaces the symlink with ``os.replace``, a single atomic rename, so a
+    server or static host sees either the old or the new site and never a
+    missing or half-written one. Older releases are removed afterwards.
+
+    Only files this build writes end up in the release: a file whose bytes
+    equal the previous build's copy is hard-linked from it (keeping its
+    mtime and ETag), everything else is written fresh. Files the build no
+    longer produces, such as pages of deleted sources, disappear with the
+    previous release.
+
+    Example:
+        >>> out = BuildOutput("site")
+        >>> out.open()
+        >>> out.write("index.html", b"<html>...</html>")
+        >>> out.commit()
+    """
+
+    def __init__(self, output: str) -> None:
+        self.output = os.path.abspath(output)
+        parent, name = os.path.split(self.output)
+        self.releases = os.path.join(parent, f".{name}.builds")
+        self.state = os.path.join(parent, f".{name}.state")
+        self._link = os.path.join(parent, f".{name}.link")
+        self.staging = ""
+        self.written = 0
+        self.unchanged = 0
+        self._previous: str | None = None
+        self._dirs: set[str] = set()
+
+    def open(self) -> None:
+        """Create an empty release directory to write into."""
+        os.makedirs(self.releases, exist_ok=True)
+        self.staging = self._make_release()
+        self._dirs = {self.staging}
+        self._previous = self.output if os.path.isdir(self.output) else None
+
+    def state_path(self, name: str) -> str:
+        """
+        Path of a file kept between builds but never published.
+
+        Build state such as the link graph lives in ``.site.state/`` next
+        to the releases, so a static host serving the output never sees it.
+        """
+        return os.path.join(self.state, name)
+
+    def _make_release(self) -> str:
+        """
+        Create a uniquely named release directory.
+
+        Unlike ``tempfile.mkdtemp`` (mode 0700) this honours the umask, so
+        a static host running as another user can read the published site.
+        """
+        while True:
+            release = os.path.join(self.releases, f"build-{secrets.token_hex(6)}")
+            try:
+                os.mkdir(release)
+            except FileExistsError:
+                continue
+            return release
+
+    def path(self, relative: str) -> str:
+        """
+        Prepare a staging path for a writer that needs a file name.
+
+        Args:
+            relative: Path relative to the output directory.
+
+        Returns:
+            Absolute staging path with its directory created.
+        """
+        target = os.path.join(self.staging, relative)
+        directory = os.path.dirname(target)
+        if directory not in self._dirs:
+            os.makedirs(directory, exist_ok=True)
+            self._dirs.add(directory)
+        return target
+
+    def _reuse(self, relative: str, data: bytes) -> bool:
+        """Link the previous build's copy into staging if its bytes are identical."""
+        if self._previous is None:
+            return False
+        previous = os.path.join(self._previous, relative)
+        try:
+            if os.path.getsize(previous) != len(data):
+                return False
+            with open(previous, "rb") as f:
+                if f.read() != data:
+                    return False
+        except OSError:
+            return False
+        target = self.path(relative)
+        try:
+            os.link(previous, target)
+        except OSError:
+            shutil.copy2(previous, target)
+        return True
+
+    def write(self, relative: str, data: bytes) -> bool:
+        """
+        Write a file unless the previous build produced the same bytes.
+
+        Args:
+            relative: Path relative to the output directory.
+            data: File contents.
+
+        Returns:
+            True if the file was written, False if the previous copy was reused.
+        """
+        if self._reuse(relative, data):
+            self.unchanged += 1
+            return False
+        with open(self.path(relative), "wb") as f:
+            f.write(data)
+        self.written += 1
+        return True
+
+    def commit(self) -> None:
+        """Point the output at the new release and remove older releases."""
+        if os.path.lexists(self._link):
+            os.unlink(self._link)
+        release = os.path.relpath(self.staging, os.path.dirname(self.output))
+        try:
+            os.symlink(release, self._link, target_is_directory=True)
+        except OSError:
+            # no symlink support (e.g. Windows without the privilege)
+            self._rename_into_place()
+        else:
+            if os.path.isdir(self.output) and not os.path.islink(self.output):
+                # a plain directory from an older mkpy cannot be replaced
+                # atomically; it is moved aside once, later builds swap the link
+                os.rename(self.output, self.staging + ".legacy")
+            os.replace(self._link, self.output)
+        for entry in os.listdir(self.releases):
+            path = os.path.join(self.releases, entry)
+            if path != self.staging:
+                shutil.rmtree(path, ignore_errors=True)
+
+    def _rename_into_place(self) -> None:
+        """Fallback swap with two renames; the output is briefly missing."""
+        backup = self.staging + ".previous"
+        if os.path.lexists(self.output):
+            os.rename(self.output, backup)
+        os.rename(self.staging, self.output)
+        self.staging = self.output
+        if os.path.isdir(backup):
+            shutil.rmtree(backup, ignore_errors=True)
+
+    def discard(self) -> None:
+        """Remove the new release, leaving the previous output live."""
+        shutil.rmtree(self.staging, ignore_errors=True)
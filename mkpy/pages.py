@@ -0,0 +1,186 @@
+"""Compact, lazily loaded page sources for mkpy."""
+
+from __future__ import annotations
+
+import mmap
+import os
+import threading
+import time
+from collections.abc import Hashable
+from typing import Callable, TypeVar
+
+from .meta import PageMeta, scan_headings, scan_metadata
+
+T = TypeVar("T")
+
+
+class PageRecord:
+    """
+    What mkpy keeps in memory for one markdown file.
+
+    Sources are never held; ``meta`` keeps the front matter fields and
+    title until the file changes.
+    """
+
+    __slots__ = ("path", "size", "mtime", "meta")
+
+    def __init__(self, path: str) -> None:
+        self.path = path
+        self.size = -1
+        self.mtime = 0
+        self.meta: PageMeta | None = None
+
+    @property
+    def version(self) -> tuple[int, int]:
+        """Cheap identity of the file contents: (mtime_ns, size)."""
+        return (self.mtime, self.size)
+
+
+class PageStore:
+    """
+    Records for all markdown files of a site, keyed by file path.
+
+    A record is validated with a single ``stat`` when used; a full re-stat
+    of every record happens at most once per ``scan_interval`` seconds.
+    Any detected change bumps ``generation`` so derived data such as the
+    navigation can be cached against it.
+    """
+
+    def __init__(self, scan_interval: float = 1.0) -> None:
+        self.records: dict[str, PageRecord] = {}
+        self.scan_interval = scan_interval
+        self.generation = 0
+        self._scanned = 0.0
+        self._lock = threading.Lock()
+
+    def add(self, path: str) -> PageRecord:
+        """Register a file without touching the disk."""
+        record = self.records.get(path)
+        if record is None:
+            record = self.records[path] = PageRecord(path)
+        return record
+
+    def _refresh(self, record: PageRecord) -> bool:
+        try:
+            stat = os.stat(record.path)
+            version = (stat.st_mtime_ns, stat.st_size)
+        except OSError:
+            version = (0, -1)
+        if version == (record.mtime, record.size):
+            return False
+        record.mtime, record.size = version
+        record.meta = None
+        return True
+
+    def get(self, path: str) -> PageRecord:
+        """Return an up-to-date record, re-validating it against the file."""
+        record = self.add(path)
+        if self._refresh(record):
+            self.generation += 1
+        return record
+
+    def scan(self) -> int:
+        """
+        Re-validate all records if the last scan is older than ``scan_interval``.
+
+        Returns:
+            Current generation.
+        """
+        now = time.monotonic()
+        if now - self._scanned < self.scan_interval:
+            return self.generation
+        with self._lock:
+            if now - self._scanned >= self.scan_interval:
+                changed = False
+                for record in list(self.records.values()):
+                    changed = self._refresh(record) or changed
+                if changed:
+                    self.generation += 1
+                self._scanned = time.monotonic()
+        return self.generation
+
+    def cache_key(self, record: PageRecord) -> tuple:
+        """Render cache key identifying the current contents of a page."""
+        return (record.path, record.mtime, record.size)
+
+    def owns(self, key: Hashable) -> bool:
+        """Whether a render cache key belongs to a page of this store."""
+        return isinstance(key, tuple) and key[0] in self.records
+
+    def _inspect(self, record: PageRecord, scan: Callable[[bytes], T]) -> tuple[T, tuple]:
+        """
+        Run a scan over the page contents, through mmap without copying them.
+
+        Returns:
+            (scan result, cache key of the scanned version). The version
+            comes from ``fstat`` on the mapped file, so it matches the bytes
+            even if the file changed after the record was last validated.
+        """
+        if record.size < 0:
+            raise FileNotFoundError(f"File '{record.path}' not found")
+        with open(record.path, "rb") as f:
+            stat = os.fstat(f.fileno())
+            key = (record.path, stat.st_mtime_ns, stat.st_size)
+            if stat.st_size == 0:
+                return scan(b""), key
+            with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mapped:
+                return scan(mapped), key  # type: ignore[arg-type]
+
+    def _keep_meta(self, record: PageRecord, key: tuple, meta: PageMeta) -> None:
+        """Remember scanned metadata if it belongs to the record's current version."""
+        if key == self.cache_key(record):
+            record.meta = meta
+
+    def read(self, path: str) -> tuple[str, tuple]:
+        """
+        Read a page source through mmap, decoding only the body.
+
+        The metadata is scanned from the same mapping if it is not known yet.
+
+        Args:
+            path: Path to the markdown file.
+
+        Returns:
+            (markdown source without front matter, cache key of the version
+            that was read). Cache the result under that key rather than the
+            record's, which may already describe a newer save.
+        """
+        record = self.get(path)
+        known = record.meta
+
+        def body(data: bytes) -> tuple[PageMeta, str]:
+            meta = known or scan_metadata(data, os.path.basename(path))
+            return meta, data[meta.body_offset:].decode("utf-8")
+
+        (meta, text), key = self._inspect(record, body)
+        if known is None:
+            self._keep_meta(record, key, meta)
+        return text, key
+
+    def meta(self, path: str) -> PageMeta:
+        """
+        Return the page metadata, scanning the file once per version.
+
+        The scan runs over the mmap without decoding the whole file.
+        """
+        record = self.get(path)
+        if record.meta is not None:
+            return record.meta
+        filename = os.path.basename(path)
+        meta, key = self._inspect(record, lambda data: scan_metadata(data, filename))
+        self._keep_meta(record, key, meta)
+        return meta
+
+    def headings(self, path: str) -> list[tuple[int, str, str]]:
+        """
+        Scan the headings of a page; they are not kept on the record.
+
+        Returns:
+            (level, text, anchor) triples.
+        """
+        offset = self.meta(path).body_offset
+        return self._inspect(self.get(path), lambda data: scan_headings(data, offset))[0]
+
+    def title(self, path: str) -> str:
+        """Return the page title: front matter, first ``# `` heading, else the filename."""
+        return self.meta(path).title
@@ -0,0 +1,130 @@
+"""Background cache priming for mkpy."""
+
+from __future__ import annotations
+
+import re
+import threading
+from collections import Counter, deque
+from collections.abc import Iterable
+from contextlib import suppress
+from typing import TYPE_CHECKING
+
+if TYPE_CHECKING:
+    from .docs import Docs
+
+LOG_REQUEST = re.compile(r'"(?:GET|HEAD) (\S+)')
+
+
+def load_access_list(
+    file_path: str,
+    routes: Iterable[str],
+    top: int | None = None,
+    base_path: str = "",
+) -> list[str]:
+    """
+    Rank routes by how often they appear in an access list.
+
+    Each line is either a bare path ("/guide/install") or an access log
+    line in common/combined format ('"GET /guide/install HTTP/1.1"').
+
+    Args:
+        file_path: Access list or log file.
+        routes: Known routes; anything else is ignored.
+        top: Keep only the N most requested routes.
+        base_path: Mount prefix of the site, stripped from logged paths.
+
+    Returns:
+        Routes, most requested first.
+    """
+    known = set(routes)
+    counts: Counter[str] = Counter()
+    with open(file_path, encoding="utf-8", errors="replace") as f:
+        for line in f:
+            match = LOG_REQUEST.search(line)
+            path = match.group(1) if match else line.strip()
+            path = path.split("?")[0]
+            if base_path and (path == base_path or path.startswith(base_path + "/")):
+                path = path[len(base_path):]
+            path = path.rstrip("/") or "/"
+            if path in known:
+                counts[path] += 1
+    return [route for route, _ in counts.most_common(top)]
+
+
+class Prewarmer:
+    """
+    Renders routes into the cache from a pool of background threads.
+
+    Only the markdown conversion is cached, so warming goes through
+    ``render_content``: it takes a render slot like any request and
+    leaves no traces in the profiler.
+
+    Routes are taken in priority order. A route requested while still
+    queued is claimed by that request, which renders it right away; the
+    pool skips it instead of rendering the same page a second time.
+    """
+
+    def __init__(self, docs: Docs, routes: list[str], workers: int = 2) -> None:
+        routes = list(dict.fromkeys(routes))
+        self.docs = docs
+        self.workers = workers
+        self.total = len(routes)
+        self.warmed = 0
+        self._queue = deque(routes)
+        self._pending = set(routes)
+        self._lock = threading.Lock()
+        self._threads: list[threading.Thread] = []
+        self._finished = threading.Event()
+        if not routes:
+            self._finished.set()
+
+    @property
+    def done(self) -> bool:
+        return self._finished.is_set()
+
+    def start(self) -> None:
+        """Start the worker threads."""
+        for number in range(self.workers):
+            thread = threading.Thread(
+                target=self._work, name=f"mkpy-prewarm-{number}", daemon=True
+            )
+            thread.start()
+            self._threads.append(thread)
+
+    def claim(self, route: str) -> None:
+        """Take a still-queued route off the queue; the caller renders it."""
+        with self._lock:
+            if route in self._pending:
+                self._pending.discard(route)
+                self._mark_warmed()
+
+    def wait(self, timeout: float | None = None) -> bool:
+        """Block until every route is warmed; returns False on timeout."""
+        return self._finished.wait(timeout)
+
+    def _mark_warmed(self) -> None:
+        self.warmed += 1
+        if self.warmed == self.total:
+            self._finished.set()
+
+    def _next(self) -> str | None:
+        with self._lock:
+            while self._queue:
+                route = self._queue.popleft()
+                if route in self._pending:
+                    self._pending.discard(route)
+                    return route
+            return None
+
+    def _work(self) -> None:
+        while True:
+            route = self._next()
+            if route is None:
+                return
+            file_path = self.docs.routes.get(route)
+            if file_path is not None:
+                # a broken page is reported when it is actually requested
+                with suppress(Exception):
+                    self.docs.render_content(file_path)
+            with self._lock:
+                self._mark_warmed()
@@ -0,0 +1,116 @@
+"""Per-request render tracing for mkpy."""
+
+from __future__ import annotations
+
+import threading
+import time
+from collections import deque
+from collections.abc import Iterator
+from contextlib import contextmanager, nullcontext
+
+PHASES = ("read", "markdown", "navigation", "assets", "template", "write")
+
+
+class RenderTrace:
+    """Phase timings of a single render."""
+
+    __slots__ = ("route", "phases", "started")
+
+    def __init__(self, route: str) -> None:
+        self.route = route
+        self.phases: dict[str, float] = {}
+        self.started = time.time()
+
+    @property
+    def total(self) -> float:
+        return sum(self.phases.values())
+
+
+class Profiler:
+    """
+    Opt-in recorder of render phase timings.
+
+    Finished traces go into a ring buffer of fixed size, so memory stays
+    bounded however long the server runs. When disabled every hook is a
+    no-op.
+    """
+
+    def __init__(self, enabled: bool = False, size: int = 1000) -> None:
+        self.enabled = enabled
+        self.traces: deque[RenderTrace] = deque(maxlen=size)
+        self._local = threading.local()
+
+    @contextmanager
+    def _trace(self, route: str) -> Iterator[RenderTrace]:
+        current = getattr(self._local, "trace", None)
+        if current is not None:
+            yield current
+            return
+        trace = self._local.trace = RenderTrace(route)
+        try:
+            yield trace
+        finally:
+            self._local.trace = None
+            self.traces.append(trace)
+
+    def trace(self, route: str):
+        """
+        Collect phases recorded on this thread into one trace.
+
+        Nested calls reuse the outer trace, so a request handler can wrap
+        both rendering and writing the response.
+        """
+        if not self.enabled:
+            return nullcontext()
+        return self._trace(route)
+
+    @contextmanager
+    def _phase(self, name: str) -> Iterator[None]:
+        started = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.record(name, time.perf_counter() - started)
+
+    def phase(self, name: str):
+        """Time a block as the given phase of the current trace."""
+        if not self.enabled:
+            return nullcontext()
+        return self._phase(name)
+
+    def record(self, name: str, seconds: float) -> None:
+        """Add a phase timing to the current trace."""
+        trace = getattr(self._local, "trace", None)
+        if trace is not None:
+            trace.phases[name] = trace.phases.get(name, 0.0) + seconds
+
+    def slowest(self, limit: int = 20) -> list[dict]:
+        """
+        Aggregate buffered traces per route, slowest first.
+
+        Args:
+            limit: Maximum number of routes to return.
+
+        Returns:
+            List of dicts with route, count, mean, max and mean per phase.
+        """
+        by_route: dict[str, list[RenderTrace]] = {}
+        for trace in list(self.traces):
+            by_route.setdefault(trace.route, []).append(trace)
+
+        rows: list[dict] = []
+        for route, traces in by_route.items():
+            totals = [t.total for t in traces]
+            phases = {
+                name: sum(t.phases.get(name, 0.0) for t in traces) / len(traces)
+                for name in PHASES
+            }
+            rows.append({
+                "route": route,
+                "count": len(traces),
+                "mean": sum(totals) / len(totals),
+                "max": max(totals),
+                "phases": phases,
+            })
+        rows.sort(key=lambda row: row["max"], reverse=True)
+        return rows[:limit]
@@ -2,48 +2,365 @@
 
 from __future__ import annotations
 
+import io
 import mimetypes
 import os
+import queue
+import socket
+import threading
+import time
+from collections.abc import Iterator
+from contextlib import contextmanager, suppress
 from http.server import BaseHTTPRequestHandler, HTTPServer
 from typing import TYPE_CHECKING
+from urllib.parse import parse_qs, urlsplit
+
+from .cache import RenderCache
+from .metrics import Metrics
+from .singleflight import SingleFlight
+from .static import ENCODINGS, BuiltSite, accepted_encodings, etag
 
 if TYPE_CHECKING:
     from .docs import Docs
 
 
-class DocsHandler(BaseHTTPRequestHandler):
-    """HTTP request handler for mkpy documentation server."""
+class Limits:
+    """
+    Capacity limits of the HTTP server.
 
-    docs: Docs = None  # type: ignore[assignment]
+    Connections are handled by a fixed pool of ``workers`` threads. Up to
+    ``queue_depth`` accepted connections wait for a free worker; beyond that
+    the server answers 503 right away. Markdown conversions additionally need
+    one of ``max_renders`` slots, taken only by the request that actually
+    converts a page, so static files, cached pages and requests waiting on
+    an in-flight render keep flowing while conversions are saturated.
+
+    Args:
+        workers: Threads handling connections.
+        max_renders: Pages rendered at the same time.
+        queue_depth: Connections waiting for a worker before 503 is sent.
+        read_timeout: Seconds a client may take to send its request line and
+            headers in total, however slowly the bytes trickle in.
+        write_timeout: Seconds a client may take to receive the response.
+        render_wait: Seconds a request waits for a render slot before 503.
+        retry_after: Value of the Retry-After header on 503 responses.
+    """
+
+    def __init__(
+        self,
+        workers: int = 16,
+        max_renders: int = 4,
+        queue_depth: int = 64,
+        read_timeout: float = 10.0,
+        write_timeout: float = 30.0,
+        render_wait: float = 1.0,
+        retry_after: int = 1,
+    ) -> None:
+        self.workers = max(1, workers)
+        self.max_renders = max(1, max_renders)
+        self.queue_depth = max(1, queue_depth)
+        self.read_timeout = read_timeout
+        self.write_timeout = write_timeout
+        self.render_wait = render_wait
+        self.retry_after = retry_after
+        self._render_slots = threading.BoundedSemaphore(self.max_renders)
+
+    @contextmanager
+    def render_slot(self) -> Iterator[None]:
+        """
+        Hold a render slot, waiting at most ``render_wait`` seconds for one.
+
+        Raises:
+            RenderBusyError: If no slot frees up in time.
+        """
+        if not self._render_slots.acquire(timeout=self.render_wait):
+            raise RenderBusyError("All render slots are busy")
+        try:
+            yield
+        finally:
+            self._render_slots.release()
+
+
+class RenderBusyError(RuntimeError):
+    """Raised when a page conversion cannot get a render slot in time."""
+
+
+def busy_response(retry_after: int) -> bytes:
+    """Raw 503 response sent to connections rejected before parsing."""
+    return (
+        "HTTP/1.0 503 Service Unavailable\r\n"
+        f"Retry-After: {retry_after}\r\n"
+        "Content-Type: text/plain; charset=utf-8\r\n"
+        "Content-Length: 12\r\n"
+        "Connection: close\r\n"
+        "\r\n"
+        "Server busy\n"
+    ).encode("ascii")
+
+
+class _DeadlineReader(socket.SocketIO):
+    """
+    Socket reader bounding the total time of a read, not each ``recv``.
+
+    While ``deadline`` is set every read gets only the time left until it,
+    so a client sending one byte at a time still times out.
+    """
+
+    deadline: float | None = None
+
+    def readinto(self, b) -> int | None:
+        if self.deadline is not None:
+            remaining = self.deadline - time.monotonic()
+            if remaining <= 0:
+                raise socket.timeout("request not received in time")
+            self._sock.settimeout(remaining)  # type: ignore[attr-defined]
+        return super().readinto(b)
+
+
+class PooledHandler(BaseHTTPRequestHandler):
+    """
+    Request handling shared by the servers: timeouts, metrics and files.
+
+    Subclasses answer a GET in ``_handle_get``.
+    """
+
+    METRICS_PATH = "/_mkpy/metrics"
+
+    server: PooledServer
+
+    def setup(self) -> None:
+        """Read requests through a reader that enforces the read deadline."""
+        super().setup()
+        self.rfile.close()
+        self._reader = _DeadlineReader(self.connection, "rb")
+        self.rfile = io.BufferedReader(self._reader)
+
+    def handle_one_request(self) -> None:
+        """Give the client ``read_timeout`` seconds for request line and headers."""
+        self._reader.deadline = time.monotonic() + self.server.limits.read_timeout
+        super().handle_one_request()
+
+    def parse_request(self) -> bool:
+        """Parse the request and lift the read deadline once headers are in."""
+        parsed = super().parse_request()
+        self._reader.deadline = None
+        return parsed
+
+    def handle(self) -> None:
+        """Handle a connection, tracking it in the open connections gauge."""
+        metrics = self.server.metrics
+        metrics.add("mkpy_open_connections", 1)
+        try:
+            super().handle()
+        except (socket.timeout, ConnectionError):
+            # slow or vanished client; the worker moves on
+            self.close_connection = True
+        finally:
+            metrics.add("mkpy_open_connections", -1)
+
+    def end_headers(self) -> None:
+        """Switch the connection to the write timeout before the body is sent."""
+        self.connection.settimeout(self.server.limits.write_timeout)
+        super().end_headers()
+
+    def send_response(self, code: int, message: str | None = None) -> None:
+        """Send response line and remember the status code for logging and metrics."""
+        self.response_code = code
+        super().send_response(code, message)
 
     def do_GET(self) -> None:
         """Handle GET requests."""
         path = self.path.split("?")[0].rstrip("/") or "/"
-
-        if path == "/sitemap.xml":
-            sitemap = self.docs.generate_sitemap(
-                f"http://{self.docs.host}:{self.docs.port}"
+        started = time.perf_counter()
+        metrics = self.server.metrics
+        self.route_label = "unmatched"
+        try:
+            if path == self.METRICS_PATH:
+                self.route_label = path
+                self._serve_metrics()
+            else:
+                self._handle_get(path)
+        finally:
+            code = str(getattr(self, "response_code", 0))
+            metrics.inc("mkpy_http_requests_total", route=self.route_label, code=code)
+            metrics.observe(
+                "mkpy_http_request_duration_seconds",
+                time.perf_counter() - started,
+                route=self.route_label,
             )
+
+    def _handle_get(self, path: str) -> None:
+        """Answer a GET request; ``path`` has no query string or trailing slash."""
+        raise NotImplementedError
+
+    def _serve_metrics(self) -> None:
+        """Serve server metrics in Prometheus text format."""
+        body = self.server.metrics_text().encode("utf-8")
+        self.send_response(200)
+        self.send_header("Content-Type", "text/plain; version=0.0.4; charset=utf-8")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def _serve_file(self, file_path: str, status: int = 200) -> None:
+        """
+        Serve a file from disk.
+
+        Uses a precompressed .br/.gz sibling when the client accepts it and
+        the sibling is at least as new as the file, answers If-None-Match
+        with 304 and sends the body with sendfile.
+        """
+        stat = os.stat(file_path)
+        mime_type, _ = mimetypes.guess_type(file_path)
+        content_type = mime_type or "application/octet-stream"
+
+        served_path, size, encoding = file_path, stat.st_size, None
+        accepted = accepted_encodings(self.headers.get("Accept-Encoding"))
+        for coding, suffix in ENCODINGS:
+            if coding in accepted:
+                try:
+                    sibling = os.stat(file_path + suffix)
+                except OSError:
+                    continue
+                if sibling.st_mtime_ns < stat.st_mtime_ns:
+                    continue  # stale: the file was edited after compressing
+                served_path, size, encoding = file_path + suffix, sibling.st_size, coding
+                break
+
+        tag = etag(stat, f"-{encoding}" if encoding else "")
+        if status == 200:
+            if_none_match = self.headers.get("If-None-Match", "")
+            if tag in (value.strip() for value in if_none_match.split(",")):
+                self.send_response(304)
+                self.send_header("ETag", tag)
+                self.end_headers()
+                return
+
+        self.send_response(status)
+        self.send_header("Content-Type", content_type)
+        self.send_header("Content-Length", str(size))
+        self.send_header("Vary", "Accept-Encoding")
+        if status == 200:
+            self.send_header("ETag", tag)
+        if encoding:
+            self.send_header("Content-Encoding", encoding)
+        self.end_headers()
+
+        with open(served_path, "rb") as f:
+            try:
+                self.connection.sendfile(f)
+            except (AttributeError, NotImplementedError):
+                self.wfile.write(f.read())
+        self.server.metrics.inc("mkpy_static_bytes_total", size)
+
+    def log_message(self, format: str, *args) -> None:
+        """Log HTTP requests."""
+        path = self.path.split("?")[0]
+        code = str(self.response_code) if hasattr(self, "response_code") else "200"
+
+        try:
+            from rich.console import Console
+
+            console = Console()
+            if code.startswith("2"):
+                console.print(f"[green]{code}[/green] [dim]{path}[/dim]")
+            elif code.startswith("4") or code.startswith("5"):
+                console.print(f"[red]{code}[/red] [dim]{path}[/dim]")
+            else:
+                console.print(f"[yellow]{code}[/yellow] [dim]{path}[/dim]")
+        except Exception:
+            print(f"{code} {path}")
+
+
+class DocsHandler(PooledHandler):
+    """HTTP request handler for mkpy documentation server."""
+
+    docs: Docs = None  # type: ignore[assignment]
+
+    PROFILE_PATH = "/_mkpy/profile"
+    FRAGMENT_PATH = "/_mkpy/frag"
+    SEARCH_PATH = "/_mkpy/search.json"
+
+    server: DocsServer
+
+    def _handle_get(self, path: str) -> None:
+        """Find the site for a request and dispatch it."""
+        resolved = self.server.sites.resolve(self.headers.get("Host"), path)
+        if resolved is None:
+            self.send_error(404, "Site Not Found")
+            return
+        self.docs, local_path = resolved
+        self._dispatch(local_path)
+
+    def _dispatch(self, path: str) -> None:
+        """Route a GET request to the matching response."""
+        base_path = self.docs.base_path
+        if self.docs.instant_nav:
+            route = self._fragment_route(path)
+            if route in self.docs.routes:
+                self.route_label = base_path + self.FRAGMENT_PATH
+                self._serve_fragment(route)
+                return
+
+        if path == self.PROFILE_PATH and self.docs.profiler.enabled:
+            self.route_label = base_path + path
+            body = self.docs.render_profile().encode("utf-8")
+            self.send_response(200)
+            self.send_header("Content-Type", "text/html; charset=utf-8")
+            self.send_header("Cache-Control", "no-cache")
+            self.end_headers()
+            self.wfile.write(body)
+            return
+
+        if path == self.SEARCH_PATH:
+            self.route_label = base_path + path
+            body = self.docs.search_index()
             self.send_response(200)
-            self.send_header("Content-Type", "application/xml")
+            self.send_header("Content-Type", "application/json")
+            self.send_header("Content-Length", str(len(body)))
+            self.send_header("Cache-Control", "no-cache")
             self.end_headers()
-            self.wfile.write(sitemap.encode("utf-8"))
+            self.wfile.write(body)
             return
+
+        if path.startswith("/sitemap") and path.endswith(".xml"):
+            sitemap = self.docs.sitemap_files(self.docs.base_url).get(path[1:])
+            if sitemap is not None:
+                name = path if path == "/sitemap.xml" else "/sitemap-N.xml"
+                self.route_label = base_path + name
+                self.send_response(200)
+                self.send_header("Content-Type", "application/xml")
+                self.send_header("Content-Length", str(len(sitemap)))
+                self.end_headers()
+                self.wfile.write(sitemap)
+                return
         if self._serve_static(path):
+            self.route_label = "static"
             return
 
         if path in self.docs.routes:
-            html = self.docs.render(self.docs.routes[path])
+            self.route_label = base_path + path
+            prewarmer = self.docs.prewarmer
+            if prewarmer is not None and not prewarmer.done:
+                prewarmer.claim(path)
+            profiler = self.docs.profiler
+            with profiler.trace(path):
+                try:
+                    html = self.docs.render(self.docs.routes[path])
+                except RenderBusyError:
+                    self._send_busy()
+                    return
 
-            self.send_response(200)
-            self.send_header("Content-Type", "text/html; charset=utf-8")
-            self.send_header("Cache-Control", "no-cache")
-            self.end_headers()
-            self.wfile.write(html.encode("utf-8"))
+                self.send_response(200)
+                self.send_header("Content-Type", "text/html; charset=utf-8")
+                self.send_header("Cache-Control", "no-cache")
+                self.end_headers()
+                with profiler.phase("write"):
+                    self.wfile.write(html.encode("utf-8"))
 
         elif path + "/" in self.docs.routes:
             self.send_response(302)
-            self.send_header("Location", path + "/")
+            self.send_header("Location", base_path + path + "/")
             self.end_headers()
 
         else:
@@ -53,53 +370,293 @@ class DocsHandler(BaseHTTPRequestHandler):
             self.end_headers()
             self.wfile.write(html.encode("utf-8"))
 
+    def _fragment_route(self, path: str) -> str | None:
+        """Route whose fragment is requested, via /_mkpy/frag/<route> or ?fragment=1."""
+        if path == self.FRAGMENT_PATH or path.startswith(self.FRAGMENT_PATH + "/"):
+            return path[len(self.FRAGMENT_PATH):] or "/"
+        query = parse_qs(urlsplit(self.path).query)
+        if query.get("fragment", [""])[0] in ("1", "true"):
+            return path
+        return None
+
+    def _send_busy(self) -> None:
+        """Answer 503 with Retry-After because no render slot was free."""
+        self.server.metrics.inc("mkpy_rejected_requests_total", reason="renders")
+        body = b"Server busy\n"
+        self.send_response(503)
+        self.send_header("Retry-After", str(self.server.limits.retry_after))
+        self.send_header("Content-Type", "text/plain; charset=utf-8")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def _serve_fragment(self, route: str) -> None:
+        """Serve only the converted markdown of a page, for client-side navigation."""
+        try:
+            body = self.docs.render_fragment(self.docs.routes[route]).encode("utf-8")
+        except RenderBusyError:
+            self._send_busy()
+            return
+        self.send_response(200)
+        self.send_header("Content-Type", "text/html; charset=utf-8")
+        self.send_header("Content-Length", str(len(body)))
+        self.send_header("Cache-Control", "no-cache")
+        self.send_header("X-Mkpy-Fragment", "1")
+        self.end_headers()
+        self.wfile.write(body)
+
     def _serve_static(self, path: str) -> bool:
         """Serve static files from static/ folder."""
-        static_folder = os.path.join(self.docs.folder, "..", "static")
+        file_path = self.docs.static_file(path)
+        if file_path is None:
+            return False
+        self._serve_file(file_path)
+        return True
 
-        for static_base in [static_folder, "static", "assets"]:
-            if os.path.isdir(static_base):
-                file_path = os.path.join(static_base, path.lstrip("/"))
-                if os.path.isfile(file_path):
-                    self._serve_file(file_path)
-                    return True
 
-        return False
+class Sites:
+    """
+    Several documentation sites served from one process.
 
-    def _serve_file(self, file_path: str) -> None:
-        """Serve a static file."""
-        mime_type, _ = mimetypes.guess_type(file_path)
-        content_type = mime_type or "application/octet-stream"
+    Sites are mounted under a path prefix or a virtual host name and
+    share the server threads, the markdown engine, the render cache, the
+    in-flight renders and the metrics.
 
-        with open(file_path, "rb") as f:
-            content = f.read()
+    Example:
+        >>> from mkpy import Docs, Sites
+        >>> sites = Sites(port=8000)
+        >>> sites.mount("/api", Docs(folder="api-docs", title="API"))
+        >>> sites.mount_host("cli.example.com", Docs(folder="cli-docs"))
+        >>> sites.run()
+    """
 
-        self.send_response(200)
-        self.send_header("Content-Type", content_type)
-        self.send_header("Content-Length", str(len(content)))
-        self.end_headers()
-        self.wfile.write(content)
+    def __init__(
+        self,
+        host: str = "127.0.0.1",
+        port: int = 8000,
+        metrics: Metrics | None = None,
+        cache: RenderCache | None = None,
+        limits: Limits | None = None,
+    ) -> None:
+        self.host = host
+        self.port = port
+        self.metrics = metrics or Metrics()
+        self.cache = cache or RenderCache()
+        self.limits = limits or Limits()
+        self.flights = SingleFlight()
+        self.prefixes: list[tuple[str, Docs]] = []
+        self.hosts: dict[str, Docs] = {}
 
-    def log_message(self, format: str, *args) -> None:
-        """Log HTTP requests."""
-        path = self.path.split("?")[0]
-        code = str(self.response_code) if hasattr(self, "response_code") else "200"
+    @classmethod
+    def single(cls, docs: Docs) -> Sites:
+        """Wrap one Docs instance served at the root."""
+        sites = cls(
+            docs.host, docs.port, metrics=docs.metrics, cache=docs.cache, limits=docs.limits
+        )
+        sites.mount("/", docs)
+        return sites
+
+    def _attach(self, docs: Docs) -> Docs:
+        docs.metrics = self.metrics
+        docs.cache = self.cache
+        docs.flights = self.flights
+        docs.limits = self.limits
+        return docs
+
+    def mount(self, prefix: str, docs: Docs) -> Docs:
+        """
+        Serve a site under a path prefix, e.g. "/v1".
+
+        Args:
+            prefix: URL path prefix; "/" mounts at the root.
+            docs: Site to serve.
+
+        Returns:
+            The mounted Docs instance.
+        """
+        prefix = "/" + prefix.strip("/") if prefix.strip("/") else ""
+        docs.base_path = prefix
+        self.prefixes = [(p, d) for p, d in self.prefixes if p != prefix]
+        self.prefixes.append((prefix, docs))
+        self.prefixes.sort(key=lambda mount: len(mount[0]), reverse=True)
+        return self._attach(docs)
+
+    def mount_host(self, hostname: str, docs: Docs) -> Docs:
+        """
+        Serve a site for requests whose Host header matches ``hostname``.
+
+        Args:
+            hostname: Virtual host name without port.
+            docs: Site to serve.
+
+        Returns:
+            The mounted Docs instance.
+        """
+        if docs.site_url is None:
+            docs.site_url = f"http://{hostname}"
+        self.hosts[hostname.lower()] = docs
+        return self._attach(docs)
+
+    @property
+    def sites(self) -> dict[str, Docs]:
+        """All mounted sites by name: host name or path prefix."""
+        named = dict(self.hosts)
+        for prefix, docs in self.prefixes:
+            named[prefix or "/"] = docs
+        return named
+
+    def resolve(self, host_header: str | None, path: str) -> tuple[Docs, str] | None:
+        """
+        Find the site for a request.
 
+        Args:
+            host_header: Value of the Host header, if any.
+            path: Request path without query string.
+
+        Returns:
+            (docs, path relative to the site) or None if nothing matches.
+        """
+        if host_header and self.hosts:
+            docs = self.hosts.get(host_header.split(":")[0].lower())
+            if docs is not None:
+                return docs, path
+        for prefix, docs in self.prefixes:
+            if not prefix:
+                return docs, path
+            if path == prefix or path.startswith(prefix + "/"):
+                return docs, path[len(prefix):] or "/"
+        return None
+
+    def update_memory_metrics(self) -> None:
+        """Refresh the per-site memory gauge."""
+        for name, docs in self.sites.items():
+            self.metrics.set("mkpy_site_memory_bytes", docs.memory_usage(), site=name)
+
+    def run(self) -> None:
+        run_server(self)
+
+
+class BuiltHandler(PooledHandler):
+    """HTTP request handler serving a directory produced by `mkpy build`."""
+
+    server: BuiltServer
+
+    def _handle_get(self, path: str) -> None:
+        file_path = self.server.site.resolve(path)
+        if file_path is not None:
+            self.route_label = path if file_path.endswith(".html") else "static"
+            self._serve_file(file_path)
+            return
+
+        not_found = self.server.site.not_found_page
+        if not_found is not None:
+            self._serve_file(not_found, status=404)
+        else:
+            self.send_error(404, "Page Not Found")
+
+
+class PooledServer(HTTPServer):
+    """
+    HTTP server handling connections on a fixed pool of worker threads.
+
+    Accepted connections are queued for the workers; when the queue is
+    full the connection gets an immediate 503 with Retry-After instead of
+    another thread, so load spikes cannot create unbounded work.
+    """
+
+    request_queue_size = 128
+
+    metrics: Metrics
+
+    def __init__(self, address: tuple[str, int], handler: type, limits: Limits) -> None:
+        self.limits = limits
+        self._pending: queue.Queue = queue.Queue(limits.queue_depth)
+        self._stopping = threading.Event()
+        super().__init__(address, handler)
+        self._workers = [
+            threading.Thread(target=self._work, name=f"mkpy-http-{number}", daemon=True)
+            for number in range(limits.workers)
+        ]
+        for thread in self._workers:
+            thread.start()
+
+    def process_request(self, request, client_address) -> None:
+        """Queue the connection for a worker, or reject it if the queue is full."""
         try:
-            from rich.console import Console
+            self._pending.put_nowait((request, client_address))
+        except queue.Full:
+            self.metrics.inc("mkpy_rejected_requests_total", reason="queue")
+            self._reject(request)
 
-            console = Console()
-            if code.startswith("2"):
-                console.print(f"[green]{code}[/green] [dim]{path}[/dim]")
-            elif code.startswith("4") or code.startswith("5"):
-                console.print(f"[red]{code}[/red] [dim]{path}[/dim]")
-            else:
-                console.print(f"[yellow]{code}[/yellow] [dim]{path}[/dim]")
-        except Exception:
-            print(f"{code} {path}")
+    def _reject(self, request: socket.socket) -> None:
+        # never block the accept thread: drain whatever already arrived so
+        # closing does not reset the connection, then send the canned 503
+        request.settimeout(0)
+        with suppress(OSError):
+            request.recv(65536)
+        with suppress(OSError):
+            request.sendall(busy_response(self.limits.retry_after))
+        self.shutdown_request(request)
+
+    def _work(self) -> None:
+        while not self._stopping.is_set():
+            try:
+                request, client_address = self._pending.get(timeout=0.5)
+            except queue.Empty:
+                continue
+            try:
+                self.finish_request(request, client_address)
+            except Exception:
+                self.handle_error(request, client_address)
+            finally:
+                self.shutdown_request(request)
+
+    def metrics_text(self) -> str:
+        """Metrics exposition served at /_mkpy/metrics."""
+        return self.metrics.exposition()
+
+    def server_close(self) -> None:
+        super().server_close()
+        self._stopping.set()
+
+
+class DocsServer(PooledServer):
+    """HTTP server holding the mounted sites."""
+
+    def __init__(self, sites: Sites) -> None:
+        self.sites = sites
+        self.metrics = sites.metrics
+        for docs in sites.sites.values():
+            docs.limits = sites.limits
+        super().__init__((sites.host, sites.port), DocsHandler, sites.limits)
+
+    def metrics_text(self) -> str:
+        self.sites.update_memory_metrics()
+        return self.metrics.exposition()
 
 
-def run_server(docs: Docs) -> None:
+class BuiltServer(PooledServer):
+    """HTTP server for a pre-built output directory."""
+
+    def __init__(
+        self,
+        site: BuiltSite,
+        host: str = "127.0.0.1",
+        port: int = 8000,
+        limits: Limits | None = None,
+    ) -> None:
+        self.site = site
+        self.metrics = Metrics()
+        super().__init__((host, port), BuiltHandler, limits or Limits())
+
+
+def create_server(target: Docs | Sites) -> DocsServer:
+    """Create (but do not start) the documentation server."""
+    sites = target if isinstance(target, Sites) else Sites.single(target)
+    return DocsServer(sites)
+
+
+def run_server(target: Docs | Sites) -> None:
     """Start the documentation server."""
     try:
         from rich.console import Console
@@ -109,28 +666,74 @@ def run_server(docs: Docs) -> None:
     except ImportError:
         use_rich = False
 
-    DocsHandler.docs = docs
+    sites = target if isinstance(target, Sites) else Sites.single(target)
+
+    for docs in sites.sites.values():
+        static_folder = os.path.join(docs.folder, "..", "static")
+        if not os.path.exists(static_folder):
+            os.makedirs(static_folder, exist_ok=True)
 
-    static_folder = os.path.join(docs.folder, "..", "static")
-    if not os.path.exists(static_folder):
-        os.makedirs(static_folder, exist_ok=True)
+    url = f"http://{sites.host}:{sites.port}"
 
-    url = f"http://{docs.host}:{docs.port}"
+    mounted = sites.sites
+    multiple = len(mounted) > 1
 
     if use_rich:
         console.print("[bold green]⚡[/bold green] [bold]mkpy[/bold] started")
-        console.print(f"📂 Docs: [cyan]{docs.folder}[/cyan]")
-        console.print(f"🎨 Theme: [cyan]{docs.theme}[/cyan]")
+        for name, docs in mounted.items():
+            suffix = f" [dim]→ {name}[/dim]" if multiple else ""
+            console.print(f"📂 Docs: [cyan]{docs.folder}[/cyan]{suffix}")
+            console.print(f"🎨 Theme: [cyan]{docs.theme}[/cyan]")
         console.print(f"[success]➜[/success] [bold]{url}[/bold]")
         console.print("[dim]Press Ctrl+C to stop[/dim]")
     else:
         print("⚡ mkpy started")
-        print(f"📂 Docs: {docs.folder}")
-        print(f"🎨 Theme: {docs.theme}")
+        for name, docs in mounted.items():
+            suffix = f" → {name}" if multiple else ""
+            print(f"📂 Docs: {docs.folder}{suffix}")
+            print(f"🎨 Theme: {docs.theme}")
         print(f"➜ {url}")
         print("Press Ctrl+C to stop")
 
-    server = HTTPServer((docs.host, docs.port), DocsHandler)
+    server = create_server(sites)
+
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        if use_rich:
+            console.print("[warning]👋[/warning] Shutting down...")
+        else:
+            print("👋 Shutting down...")
+
+
+def run_built_server(
+    folder: str,
+    host: str = "127.0.0.1",
+    port: int = 8000,
+    limits: Limits | None = None,
+) -> None:
+    """Serve a directory produced by `mkpy build` without rendering markdown."""
+    try:
+        from rich.console import Console
+
+        console = Console()
+        use_rich = True
+    except ImportError:
+        use_rich = False
+
+    server = BuiltServer(BuiltSite(folder), host, port, limits)
+    url = f"http://{host}:{port}"
+
+    if use_rich:
+        console.print("[bold green]⚡[/bold green] [bold]mkpy[/bold] started")
+        console.print(f"📦 Build: [cyan]{folder}[/cyan]")
+        console.print(f"[success]➜[/success] [bold]{url}[/bold]")
+        console.print("[dim]Press Ctrl+C to stop[/dim]")
+    else:
+        print("⚡ mkpy started")
+        print(f"📦 Build: {folder}")
+        print(f"➜ {url}")
+        print("Press Ctrl+C to stop")
 
     try:
         server.serve_forever()
@@ -0,0 +1,71 @@
+"""Deduplication of concurrent identical work."""
+
+from __future__ import annotations
+
+import threading
+from collections.abc import Hashable
+from typing import Any, Callable, Generic, TypeVar
+
+T = TypeVar("T")
+
+
+class _Call(Generic[T]):
+    __slots__ = ("done", "value", "error")
+
+    def __init__(self) -> None:
+        self.done = threading.Event()
+        self.value: T | None = None
+        self.error: BaseException | None = None
+
+
+class SingleFlight:
+    """
+    Runs a function at most once at a time per key.
+
+    The first caller for a key computes the value; callers arriving while
+    it is in flight wait and receive the same value (or exception). Once
+    the call finishes the key is forgotten, so keys should identify an
+    input version, e.g. (path, mtime_ns, size), for changes to start a
+    new call.
+    """
+
+    def __init__(self) -> None:
+        self._calls: dict[Hashable, _Call[Any]] = {}
+        self._lock = threading.Lock()
+
+    def __len__(self) -> int:
+        return len(self._calls)
+
+    def do(self, key: Hashable, compute: Callable[[], T]) -> tuple[T, bool]:
+        """
+        Compute the value for a key, or wait for the call already in flight.
+
+        Args:
+            key: Identity of the work.
+            compute: Produces the value; only called by the first caller.
+
+        Returns:
+            (value, shared) where shared is True if another caller computed it.
+        """
+        with self._lock:
+            call = self._calls.get(key)
+            leader = call is None
+            if call is None:
+                call = self._calls[key] = _Call()
+
+        if not leader:
+            call.done.wait()
+            if call.error is not None:
+                raise call.error
+            return call.value, True  # type: ignore[return-value]
+
+        try:
+            call.value = compute()
+        except BaseException as error:
+            call.error = error
+            raise
+        finally:
+            with self._lock:
+                del self._calls[key]
+            call.done.set()
+        return call.value, False
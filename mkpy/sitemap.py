@@ -0,0 +1,93 @@
+"""Sitemap generation for mkpy."""
+
+from __future__ import annotations
+
+import time
+from collections.abc import Iterable, Iterator
+from urllib.parse import quote
+from xml.sax.saxutils import escape
+
+SITEMAP_MAX_URLS = 50_000
+
+XML_HEADER = '<?xml version="1.0" encoding="UTF-8"?>\n'
+NAMESPACE = "http://www.sitemaps.org/schemas/sitemap/0.9"
+
+
+def format_lastmod(mtime: float) -> str:
+    """Format a timestamp as a W3C datetime in UTC."""
+    return time.strftime("%Y-%m-%dT%H:%M:%S+00:00", time.gmtime(mtime))
+
+
+def _url(base_url: str, route: str) -> str:
+    return escape(base_url + quote(route, safe="/"))
+
+
+def iter_urlset(entries: Iterable[tuple[str, float | None]], base_url: str) -> Iterator[str]:
+    """
+    Yield a <urlset> document piece by piece.
+
+    Args:
+        entries: (route, mtime) pairs; mtime may be None.
+        base_url: Site URL prepended to every route.
+    """
+    yield XML_HEADER
+    yield f'<urlset xmlns="{NAMESPACE}">\n'
+    for route, mtime in entries:
+        yield f"  <url>\n    <loc>{_url(base_url, route)}</loc>\n"
+        if mtime is not None:
+            yield f"    <lastmod>{format_lastmod(mtime)}</lastmod>\n"
+        yield "  </url>\n"
+    yield "</urlset>"
+
+
+def iter_index(shards: Iterable[tuple[str, float | None]], base_url: str) -> Iterator[str]:
+    """
+    Yield a <sitemapindex> document referencing sitemap shards.
+
+    Args:
+        shards: (filename, newest mtime) pairs.
+        base_url: Site URL prepended to every shard filename.
+    """
+    yield XML_HEADER
+    yield f'<sitemapindex xmlns="{NAMESPACE}">\n'
+    for filename, mtime in shards:
+        yield f"  <sitemap>\n    <loc>{_url(base_url, '/' + filename)}</loc>\n"
+        if mtime is not None:
+            yield f"    <lastmod>{format_lastmod(mtime)}</lastmod>\n"
+        yield "  </sitemap>\n"
+    yield "</sitemapindex>"
+
+
+def build_sitemaps(
+    entries: list[tuple[str, float | None]],
+    base_url: str,
+    max_urls: int = SITEMAP_MAX_URLS,
+) -> dict[str, bytes]:
+    """
+    Build sitemap files for a site.
+
+    Small sites get a single sitemap.xml. Sites with more than
+    ``max_urls`` routes get sitemap.xml as a sitemap index pointing to
+    sitemap-1.xml, sitemap-2.xml, ... shards.
+
+    Args:
+        entries: (route, mtime) pairs in sitemap order.
+        base_url: Site URL prepended to every route.
+        max_urls: Maximum URLs per sitemap file.
+
+    Returns:
+        Mapping of file name to encoded XML.
+    """
+    if len(entries) <= max_urls:
+        return {"sitemap.xml": "".join(iter_urlset(entries, base_url)).encode("utf-8")}
+
+    files: dict[str, bytes] = {}
+    shards = []
+    for number, start in enumerate(range(0, len(entries), max_urls), start=1):
+        chunk = entries[start:start + max_urls]
+        filename = f"sitemap-{number}.xml"
+        files[filename] = "".join(iter_urlset(chunk, base_url)).encode("utf-8")
+        mtimes = [mtime for _, mtime in chunk if mtime is not None]
+        shards.append((filename, max(mtimes) if mtimes else None))
+    files["sitemap.xml"] = "".join(iter_index(shards, base_url)).encode("utf-8")
+    return files
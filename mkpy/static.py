@@ -0,0 +1,93 @@
+"""Serving pre-built output directories."""
+
+from __future__ import annotations
+
+import os
+
+NOT_FOUND_PAGE = "404.html"
+LINK_GRAPH_FILE = "links.json"
+SEARCH_INDEX_FILE = os.path.join("_mkpy", "search.json")
+
+ENCODINGS = (("br", ".br"), ("gzip", ".gz"))
+
+
+def route_filename(route: str) -> str:
+    """
+    Map a route to the HTML file `mkpy build` writes for it.
+
+    "/" -> "index.html", "/guide/install" -> "guide/install.html".
+    """
+    if route == "/":
+        return "index.html"
+    return f"{route.lstrip('/')}.html"
+
+
+def etag(stat: os.stat_result, suffix: str = "") -> str:
+    """Build a strong ETag from file modification time and size."""
+    return f'"{stat.st_mtime_ns:x}-{stat.st_size:x}{suffix}"'
+
+
+def accepted_encodings(header: str | None) -> set[str]:
+    """Parse an Accept-Encoding header into the set of acceptable codings."""
+    accepted = set()
+    for part in (header or "").split(","):
+        coding, _, params = part.partition(";")
+        params = params.strip().replace(" ", "")
+        try:
+            quality = float(params[2:]) if params.startswith("q=") else 1.0
+        except ValueError:
+            quality = 0.0
+        if coding.strip() and quality > 0:
+            accepted.add(coding.strip().lower())
+    return accepted
+
+
+class BuiltSite:
+    """
+    A directory produced by `mkpy build`.
+
+    Resolves request paths with the same mapping mkpy uses for routes,
+    so /guide/install serves guide/install.html.
+    """
+
+    def __init__(self, root: str) -> None:
+        if not os.path.isdir(root):
+            raise FileNotFoundError(f"Folder '{root}' not found")
+        self.root = os.path.abspath(root)
+
+    def _file(self, relative: str) -> str | None:
+        if any(part.startswith(".") for part in relative.replace("\\", "/").split("/")):
+            return None
+        # resolved per request: `mkpy build` swaps the root symlink to a new release
+        root = os.path.realpath(self.root)
+        full_path = os.path.realpath(os.path.join(root, relative))
+        if os.path.commonpath([root, full_path]) != root:
+            return None
+        return full_path if os.path.isfile(full_path) else None
+
+    def resolve(self, path: str) -> str | None:
+        """
+        Find the file for a request path.
+
+        Args:
+            path: Request path without query string or trailing slash.
+
+        Returns:
+            Absolute file path, or None if nothing matches.
+        """
+        relative = path.lstrip("/")
+        if path == "/":
+            return self._file("index.html")
+        if "." in os.path.basename(relative):
+            found = self._file(relative)
+            if found is not None:
+                return found
+        return (
+            self._file(route_filename(path))
+            or self._file(os.path.join(relative, "index.html"))
+        )
+
+    @property
+    def not_found_page(self) -> str | None:
+        """The 404 page written by `mkpy build`, if present."""
+        return self._file(NOT_FOUND_PAGE)
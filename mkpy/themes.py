@@ -6,7 +6,7 @@ from typing import Literal
 
 ThemeName = Literal["light", "dark"]
 
-THEMES: dict[ThemeName, str] = {
+THEMES: dict[str, str] = {
     "light": """
     * { box-sizing: border-box; }
     body {
@@ -1,14 +1,50 @@
 """Tests for mkpy."""
 from __future__ import annotations
 
+import json
 import os
+import shutil
+import socket
+import sys
 import tempfile
+import threading
+import time
+import urllib.error
+import urllib.request
+from contextlib import contextmanager
 from pathlib import Path
 
 import pytest
 
-from mkpy import Docs
-from mkpy.markdown import extract_title, render as render_markdown
+from mkpy import Docs, Sites
+from mkpy.markdown import extract_title
+from mkpy.markdown import render as render_markdown
+from mkpy.metrics import Metrics
+from mkpy.server import Limits, create_server
+
+
+@contextmanager
+def running_server(target):
+    """Run a docs server (Docs or Sites) on a free port in a background thread."""
+    target.port = 0
+    server = create_server(target)
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    try:
+        yield f"http://127.0.0.1:{server.server_address[1]}"
+    finally:
+        server.shutdown()
+        server.server_close()
+
+
+def fetch(url, headers=None):
+    """Return (status, body) for a GET request."""
+    try:
+        request = urllib.request.Request(url, headers=headers or {})
+        with urllib.request.urlopen(request) as response:
+            return response.status, response.read().decode("utf-8")
+    except urllib.error.HTTPError as error:
+        return error.code, error.read().decode("utf-8")
 
 
 class TestDocs:
@@ -151,3 +187,1071 @@ class TestMarkdown:
 
         assert "<table>" in html
         assert "<td>1</td>" in html
+
+
+class TestMetrics:
+    """Test metrics collection and the metrics endpoint."""
+
+    def test_exposition_format(self):
+        """Test counters and histograms in Prometheus text format."""
+        metrics = Metrics(buckets=(0.1, 1.0))
+        metrics.inc("mkpy_http_requests_total", route="/", code="200")
+        metrics.inc("mkpy_http_requests_total", route="/", code="200")
+        metrics.observe("mkpy_render_duration_seconds", 0.5, phase="markdown")
+
+        text = metrics.exposition()
+
+        assert "# TYPE mkpy_http_requests_total counter" in text
+        assert 'mkpy_http_requests_total{route="/",code="200"} 2' in text
+        assert 'mkpy_render_duration_seconds_bucket{phase="markdown",le="0.1"} 0' in text
+        assert 'mkpy_render_duration_seconds_bucket{phase="markdown",le="1.0"} 1' in text
+        assert 'mkpy_render_duration_seconds_bucket{phase="markdown",le="+Inf"} 1' in text
+        assert 'mkpy_render_duration_seconds_count{phase="markdown"} 1' in text
+
+    def test_metrics_endpoint(self):
+        """Test requests and render phases show up in /_mkpy/metrics."""
+        with tempfile.TemporaryDirectory() as tmpdir:
+            docs_path = Path(tmpdir) / "docs"
+            docs_path.mkdir()
+            (docs_path / "index.md").write_text("# Hello")
+
+            docs = Docs(folder=str(docs_path))
+            with running_server(docs) as url:
+                assert fetch(url + "/")[0] == 200
+                assert fetch(url + "/missing")[0] == 404
+                status, body = fetch(url + "/_mkpy/metrics")
+
+            assert status == 200
+            assert 'mkpy_http_requests_total{route="/",code="200"} 1' in body
+            assert 'mkpy_http_requests_total{route="unmatched",code="404"} 1' in body
+            assert 'mkpy_render_duration_seconds_count{phase="markdown"} 1' in body
+            assert 'mkpy_render_duration_seconds_count{phase="template"} 1' in body
+            assert "mkpy_open_connections 1" in body
+
+
+class TestProfiler:
+    """Test render tracing."""
+
+    def test_disabled_by_default(self):
+        """Test no traces are recorded unless profiling is enabled."""
+        with tempfile.TemporaryDirectory() as tmpdir:
+            docs_path = Path(tmpdir) / "docs"
+            docs_path.mkdir()
+            (docs_path / "index.md").write_text("# Hello")
+
+            docs = Docs(folder=str(docs_path))
+            docs.render(docs.routes["/"])
+
+            assert len(docs.profiler.traces) == 0
+
+    def test_render_phases_recorded(self):
+        """Test each render records its phase timings."""
+        with tempfile.TemporaryDirectory() as tmpdir:
+            docs_path = Path(tmpdir) / "docs"
+            docs_path.mkdir()
+            (docs_path / "index.md").write_text("# Hello")
+
+            docs = Docs(folder=str(docs_path), profile=True)
+            docs.render(docs.routes["/"])
+            docs.render(docs.routes["/"])
+
+            assert len(docs.profiler.traces) == 2
+            trace = docs.profiler.traces[0]
+            assert set(trace.phases) == {"read", "markdown", "navigation", "assets", "template"}
+            [row] = docs.profiler.slowest()
+            assert row["count"] == 2
+
+    def test_profile_view(self):
+        """Test /_mkpy/profile lists served routes including the write phase."""
+        with tempfile.TemporaryDirectory() as tmpdir:
+            docs_path = Path(tmpdir) / "docs"
+            docs_path.mkdir()
+            (docs_path / "index.md").write_text("# Hello")
+            (docs_path / "about.md").write_text("# About")
+
+            docs = Docs(folder=str(docs_path), profile=True)
+            with running_server(docs) as url:
+                fetch(url + "/about")
+                status, body = fetch(url + "/_mkpy/profile")
+
+            assert status == 200
+            assert "<td>/about</td>" in body
+            assert "write" in docs.profiler.traces[0].phases
+
+
+class TestSitemap:
+    """Test sitemap generation."""
+
+    def test_sitemap_cached_until_routes_change(self):
+        """Test sitemap bytes are reused and rebuilt after routes change."""
+        with tempfile.TemporaryDirectory() as tmpdir:
+            docs_path = Path(tmpdir) / "docs"
+            docs_path.mkdir()
+            (docs_path / "index.md").write_text("# Home")
+
+            docs = Docs(folder=str(docs_path))
+            first = docs.sitemap_files("http://example.com")
+            assert docs.sitemap_files("http://example.com") is first
+            assert b"<loc>http://example.com/</loc>" in first["sitemap.xml"]
+            assert b"<lastmod>" in first["sitemap.xml"]
+
+            (docs_path / "about.md").write_text("# About")
+            docs._build_routes()
+
+            assert b"http://example.com/about" in docs.generate_sitemap("http://example.com").encode()
+
+    def test_sitemap_index_for_large_sites(self):
+        """Test sites above the URL limit are split into shards."""
+        with tempfile.TemporaryDirectory() as tmpdir:
+            docs_path = Path(tmpdir) / "docs"
+            docs_path.mkdir()
+            for name in ["index", "a", "b", "c", "d"]:
+                (docs_path / f"{name}.md").write_text(f"# {name}")
+
+            docs = Docs(folder=str(docs_path))
+            docs.sitemap_max_urls = 2
+            files = docs.sitemap_files("http://example.com")
+
+            assert sorted(files) == ["sitemap-1.xml", "sitemap-2.xml", "sitemap-3.xml", "sitemap.xml"]
+            assert b"<sitemapindex" in files["sitemap.xml"]
+            assert b"<loc>http://example.com/sitemap-3.xml</loc>" in files["sitemap.xml"]
+            assert files["sitemap-1.xml"].count(b"<url>") == 2
+
+    def test_build_writes_sitemap(self):
+        """Test mkpy build writes sitemap.xml next to the pages."""
+        from typer.testing import CliRunner
+
+        from mkpy.cli import app
+
+        with tempfile.TemporaryDirectory() as tmpdir:
+            docs_path = Path(tmpdir) / "docs"
+            docs_path.mkdir()
+            (docs_path / "index.md").write_text("# Home")
+            output = Path(tmpdir) / "site"
+
+            result = CliRunner().invoke(app, [
+                "build", "--folder", str(docs_path), "--output", str(output),
+                "--site-url", "https://docs.example.com",
+            ])
+
+            assert result.exit_code == 0, result.output
+            sitemap = (output / "sitemap.xml").read_text()
+            assert "<loc>https://docs.example.com/</loc>" in sitemap
+
+    def test_build_without_site_url_skips_sitemap(self):
+        """Test mkpy build never writes localhost URLs into a sitemap."""
+        from typer.testing import CliRunner
+
+        from mkpy.cli import app
+
+        with tempfile.TemporaryDirectory() as tmpdir:
+            docs_path = Path(tmpdir) / "docs"
+            docs_path.mkdir()
+            (docs_path / "index.md").write_text("# Home")
+            output = Path(tmpdir) / "site"
+
+            result = CliRunner().invoke(
+                app, ["build", "--folder", str(docs_path), "--output", str(output)]
+            )
+
+            assert result.exit_code == 0, result.output
+            assert not (output / "sitemap.xml").exists()
+            assert "--site-url" in result.output
+
+
+class TestPageStore:
+    """Test compact page records."""
+
+    def test_title_and_source(self):
+        """Test titles come from the first heading and sources decode through mmap."""
+        from mkpy.pages import PageStore
+
+        with tempfile.TemporaryDirectory() as tmpdir:
+            page = Path(tmpdir) / "guide.md"
+            page.write_text("intro\n\n# Guide Title\n\ntext ü\n", encoding="utf-8")
+            empty = Path(tmpdir) / "empty.md"
+            empty.write_text("")
+
+            store = PageStore()
+
+            assert store.title(str(page)) == "Guide Title"
+            assert store.headings(str(page)) == [(1, "Guide Title", "guide-title")]
+            assert not hasattr(store.records[str(page)].meta, "headings")
+            assert store.read(str(page))[0].endswith("text ü\n")
+            assert store.title(str(empty)) == "Empty"
+            assert store.read(str(empty))[0] == ""
+
+    def test_record_is_compact(self):
+        """Test records carry no per-instance dict."""
+        from mkpy.pages import PageRecord
+
+        record = PageRecord("docs/index.md")
+
+        assert not hasattr(record, "__dict__")
+        assert sys.getsizeof(record) < 100
+
+    def test_navigation_follows_edits(self):
+        """Test a changed title is picked up by the cached navigation."""
+        with tempfile.TemporaryDirectory() as tmpdir:
+            docs_path = Path(tmpdir) / "docs"
+            docs_path.mkdir()
+            (docs_path / "index.md").write_text("# Home")
+            about = docs_path / "about.md"
+            about.write_text("# About")
+
+            docs = Docs(folder=str(docs_path))
+            docs.pages.scan_interval = 0
+            assert ("/about", "About") in docs.navigation
+
+            about.write_text("# About Us")
+            os.utime(about, ns=(1, 1))
+
+            assert ("/about", "About Us") in docs.navigation
+            assert '<a href="/about">About Us</a>' in docs.render(docs.routes["/"])
+
+
+class TestSites:
+    """Test serving several sites from one server."""
+
+    def make_docs(self, root, name):
+        docs_path = Path(root) / name
+        docs_path.mkdir()
+        (docs_path / "index.md").write_text(f"# {name} home")
+        (docs_path / "about.md").write_text(f"# About {name}")
+        return Docs(folder=str(docs_path), title=name)
+
+    def test_resolve(self):
+        """Test prefix and virtual host resolution."""
+        with tempfile.TemporaryDirectory() as tmpdir:
+            api = self.make_docs(tmpdir, "api")
+            cli = self.make_docs(tmpdir, "cli")
+            sites = Sites()
+            sites.mount("/api", api)
+            sites.mount_host("cli.example.com", cli)
+
+            assert sites.resolve(None, "/api/about") == (api, "/about")
+            assert sites.resolve(None, "/api") == (api, "/")
+            assert sites.resolve(None, "/apiary") is None
+            assert sites.resolve("cli.example.com:8000", "/about") == (cli, "/about")
+
+    def test_serve_mounted_sites(self):
+        """Test pages, links and metrics across mounted sites."""
+        with tempfile.TemporaryDirectory() as tmpdir:
+            api = self.make_docs(tmpdir, "api")
+            cli = self.make_docs(tmpdir, "cli")
+            sites = Sites()
+            sites.mount("/api", api)
+            sites.mount_host("cli.example.com", cli)
+
+            with running_server(sites) as url:
+                status, body = fetch(url + "/api/about")
+                assert status == 200
+                assert "About api" in body
+                assert '<a href="/api/about">About api</a>' in body
+
+                status, body = fetch(url + "/about", headers={"Host": "cli.example.com"})
+                assert status == 200
+                assert "About cli" in body
+
+                assert fetch(url + "/elsewhere")[0] == 404
+                status, metrics = fetch(url + "/_mkpy/metrics")
+
+            assert 'mkpy_http_requests_total{route="/api/about",code="200"} 1' in metrics
+            assert 'mkpy_site_memory_bytes{site="/api"}' in metrics
+            assert 'mkpy_site_memory_bytes{site="cli.example.com"}' in metrics
+            assert api.metrics is cli.metrics is sites.metrics
+
+
+class TestPrewarm:
+    """Test render cache and background prewarming."""
+
+    def test_render_cache(self):
+        """Test repeated renders reuse converted markdown until the file changes."""
+        with tempfile.TemporaryDirectory() as tmpdir:
+            docs_path = Path(tmpdir) / "docs"
+            docs_path.mkdir()
+            page = docs_path / "index.md"
+            page.write_text("# Hello")
+
+            docs = Docs(folder=str(docs_path))
+            docs.render(str(page))
+            docs.render(str(page))
+            assert (docs.cache.hits, docs.cache.misses) == (1, 1)
+
+            page.write_text("# Changed")
+            os.utime(page, ns=(1, 1))
+            assert "Changed" in docs.render(str(page))
+
+    def test_prewarm_all_routes(self):
+        """Test prewarming fills the cache for every route."""
+        with tempfile.TemporaryDirectory() as tmpdir:
+            docs_path = Path(tmpdir) / "docs"
+            docs_path.mkdir()
+            for name in ["index", "a", "b", "c"]:
+                (docs_path / f"{name}.md").write_text(f"# {name}")
+
+            docs = Docs(folder=str(docs_path), profile=True)
+            prewarmer = docs.prewarm(workers=2)
+
+            assert prewarmer.wait(timeout=10)
+            assert len(docs.cache) == 4
+            assert len(docs.profiler.traces) == 0
+
+    def test_access_list_ranking(self):
+        """Test access lists and logs rank known routes by hits."""
+        from mkpy.prewarm import load_access_list
+
+        with tempfile.TemporaryDirectory() as tmpdir:
+            access = Path(tmpdir) / "access.log"
+            access.write_text(
+                '1.2.3.4 - - [01/Jan/2026] "GET /guide/install HTTP/1.1" 200 10\n'
+                '1.2.3.4 - - [01/Jan/2026] "GET /guide/install?x=1 HTTP/1.1" 200 10\n'
+                "/about\n"
+                "/unknown\n"
+            )
+
+            routes = load_access_list(str(access), ["/", "/about", "/guide/install"])
+
+            assert routes == ["/guide/install", "/about"]
+            assert load_access_list(str(access), ["/about", "/guide/install"], top=1) == [
+                "/guide/install"
+            ]
+
+
+class TestBuiltServer:
+    """Test serving the output of mkpy build."""
+
+    def build(self, tmpdir, *extra):
+        from typer.testing import CliRunner
+
+        from mkpy.cli import app
+
+        docs_path = Path(tmpdir) / "docs"
+        docs_path.mkdir()
+        (docs_path / "index.md").write_text("# Home")
+        (docs_path / "guide").mkdir()
+        (docs_path / "guide" / "install.md").write_text("# Install")
+        output = Path(tmpdir) / "site"
+        result = CliRunner().invoke(
+            app, ["build", "--folder", str(docs_path), "--output", str(output), *extra]
+        )
+        assert result.exit_code == 0, result.output
+        return output
+
+    @contextmanager
+    def serving(self, output):
+        from mkpy.server import BuiltServer
+        from mkpy.static import BuiltSite
+
+        server = BuiltServer(BuiltSite(str(output)), port=0)
+        threading.Thread(target=server.serve_forever, daemon=True).start()
+        try:
+            yield f"http://127.0.0.1:{server.server_address[1]}"
+        finally:
+            server.shutdown()
+            server.server_close()
+
+    def test_route_mapping_and_404(self):
+        """Test routes map to built HTML files and misses get the built 404 page."""
+        with tempfile.TemporaryDirectory() as tmpdir:
+            output = self.build(tmpdir, "--site-url", "https://docs.example.com")
+            with self.serving(output) as url:
+                status, body = fetch(url + "/guide/install")
+                assert status == 200
+                assert "Install" in body
+                assert fetch(url + "/")[0] == 200
+                assert fetch(url + "/sitemap.xml")[0] == 200
+
+                status, body = fetch(url + "/missing")
+                assert status == 404
+                assert "Page Not Found" in body
+
+                assert fetch(url + "/../docs/index.md")[0] == 404
+
+    def test_etag_and_compressed_sibling(self):
+        """Test conditional requests and precompressed responses."""
+        import gzip
+
+        with tempfile.TemporaryDirectory() as tmpdir:
+            output = self.build(tmpdir, "--compress")
+            assert (output / "guide" / "install.html.gz").exists()
+
+            with self.serving(output) as url:
+                request = urllib.request.Request(
+                    url + "/guide/install", headers={"Accept-Encoding": "gzip"}
+                )
+                with urllib.request.urlopen(request) as response:
+                    assert response.headers["Content-Encoding"] == "gzip"
+                    assert b"Install" in gzip.decompress(response.read())
+                    tag = response.headers["ETag"]
+
+                request = urllib.request.Request(
+                    url + "/guide/install",
+                    headers={"Accept-Encoding": "gzip", "If-None-Match": tag},
+                )
+                with pytest.raises(urllib.error.HTTPError) as error:
+                    urllib.request.urlopen(request)
+                assert error.value.code == 304
+
+    def test_stale_compressed_sibling_is_ignored(self):
+        """Test a .gz older than its file is not served."""
+        with tempfile.TemporaryDirectory() as tmpdir:
+            output = self.build(tmpdir, "--compress")
+            page = output / "guide" / "install.html"
+            page.write_text("<html>Edited</html>")
+            stamp = os.stat(page.with_suffix(".html.gz")).st_mtime_ns + 1_000_000_000
+            os.utime(page, ns=(stamp, stamp))
+
+            with self.serving(output) as url:
+                request = urllib.request.Request(
+                    url + "/guide/install", headers={"Accept-Encoding": "gzip"}
+                )
+                with urllib.request.urlopen(request) as response:
+                    assert response.headers["Content-Encoding"] is None
+                    assert response.read() == b"<html>Edited</html>"
+
+
+class TestLinks:
+    """Test the internal link graph."""
+
+    def test_resolve_link(self):
+        """Test internal hrefs are resolved relative to the page route."""
+        from mkpy.links import resolve_link
+
+        assert resolve_link("setup", "/guide/install") == "/guide/setup"
+        assert resolve_link("../about/#team", "/guide/install") == "/about"
+        assert resolve_link("/faq?x=1", "/") == "/faq"
+        assert resolve_link("https://example.com/", "/") is None
+        assert resolve_link("mailto:me@example.com", "/") is None
+        assert resolve_link("#section", "/") is None
+
+    def test_broken_orphans_and_incremental_update(self):
+        """Test broken links, orphans, and skipping unchanged pages."""
+        from mkpy.links import LinkGraph
+
+        graph = LinkGraph()
+        routes = {"/", "/about", "/faq"}
+        graph.update("/", ("a", 1, 1), lambda: '<a href="/about">About</a> <a href="/gone">x</a>')
+        graph.update("/about", ("b", 1, 1), lambda: '<p><a href="/">Home</a></p>')
+
+        assert graph.broken(routes) == [("/", "/gone")]
+        assert graph.orphans(routes) == ["/faq"]
+
+        def fail():
+            raise AssertionError("unchanged page re-read")
+
+        assert graph.update("/", ("a", 1, 1), fail) is False
+        assert graph.update("/", ("a", 2, 1), lambda: '<a href="faq">FAQ</a>') is True
+        assert graph.broken(routes) == []
+
+    def test_strict_build_fails_on_broken_links(self):
+        """Test --strict turns broken links into a failed build."""
+        from typer.testing import CliRunner
+
+        from mkpy.cli import app
+
+        with tempfile.TemporaryDirectory() as tmpdir:
+            docs_path = Path(tmpdir) / "docs"
+            docs_path.mkdir()
+            (docs_path / "index.md").write_text("# Home\n\n[Install](install.md)")
+            output = Path(tmpdir) / "site"
+            args = ["build", "--folder", str(docs_path), "--output", str(output)]
+
+            assert CliRunner().invoke(app, args).exit_code == 0
+            result = CliRunner().invoke(app, [*args, "--strict"])
+
+            assert result.exit_code == 1
+            assert "/install.md" in result.output
+
+
+class TestBuildOutput:
+    """Tests for staged build output."""
+
+    def run_build(self, docs_path, output, *extra):
+        from typer.testing import CliRunner
+
+        from mkpy.cli import app
+
+        return CliRunner().invoke(
+            app, ["build", "--folder", str(docs_path), "--output", str(output), *extra]
+        )
+
+    def test_rebuild_swaps_output_and_keeps_unchanged_files(self):
+        """Test a rebuild rewrites only changed files and leaves no staging behind."""
+        with tempfile.TemporaryDirectory() as tmpdir:
+            docs_path = Path(tmpdir) / "docs"
+            docs_path.mkdir()
+            (docs_path / "index.md").write_text("# Home\n\n[Install](install)")
+            (docs_path / "install.md").write_text("# Install\n\n[Home](/)")
+            output = Path(tmpdir) / "site"
+
+            assert self.run_build(docs_path, output, "--no-nav").exit_code == 0
+            index_stat = os.stat(output / "index.html")
+            old_install = output / "install.html"
+            with open(old_install, "rb") as live:
+                (docs_path / "install.md").write_text("# Install\n\nUpdated [Home](/)")
+                result = self.run_build(docs_path, output, "--no-nav")
+                live_bytes = live.read()
+
+            assert result.exit_code == 0, result.output
+            assert os.stat(output / "index.html").st_mtime_ns == index_stat.st_mtime_ns
+            assert "Updated" in (output / "install.html").read_text()
+            assert b"Updated" not in live_bytes
+            assert (Path(tmpdir) / ".site.state" / "links.json").is_file()
+            assert not (output / ".mkpy").exists()
+            assert output.is_symlink()
+            assert sorted(os.listdir(tmpdir)) == [".site.builds", ".site.state", "docs", "site"]
+            assert len(os.listdir(Path(tmpdir) / ".site.builds")) == 1
+
+    def test_release_is_readable_by_other_users(self):
+        """Test the release directory follows the umask instead of mode 0700."""
+        with tempfile.TemporaryDirectory() as tmpdir:
+            docs_path = Path(tmpdir) / "docs"
+            docs_path.mkdir()
+            (docs_path / "index.md").write_text("# Home")
+            output = Path(tmpdir) / "site"
+
+            previous = os.umask(0o022)
+            try:
+                result = self.run_build(docs_path, output)
+            finally:
+                os.umask(previous)
+
+            assert result.exit_code == 0, result.output
+            assert os.stat(output).st_mode & 0o777 == 0o755
+            assert os.stat(Path(tmpdir) / ".site.builds").st_mode & 0o777 == 0o755
+
+    def test_rebuild_drops_files_no_longer_produced(self):
+        """Test pages of deleted sources and dropped .gz siblings are removed."""
+        with tempfile.TemporaryDirectory() as tmpdir:
+            docs_path = Path(tmpdir) / "docs"
+            docs_path.mkdir()
+            (docs_path / "index.md").write_text("# Home v1")
+            (docs_path / "old.md").write_text("# Old")
+            output = Path(tmpdir) / "site"
+
+            assert self.run_build(docs_path, output, "--compress").exit_code == 0
+            assert (output / "old.html").is_file() and (output / "index.html.gz").is_file()
+            (docs_path / "old.md").unlink()
+            (docs_path / "index.md").write_text("# Home v2")
+            result = self.run_build(docs_path, output)
+
+            assert result.exit_code == 0, result.output
+            assert not (output / "old.html").exists()
+            assert not (output / "index.html.gz").exists()
+            assert "Home v2" in (output / "index.html").read_text()
+
+    def test_plain_output_directory_is_migrated(self):
+        """Test an existing plain output directory is replaced by the release symlink."""
+        with tempfile.TemporaryDirectory() as tmpdir:
+            docs_path = Path(tmpdir) / "docs"
+            docs_path.mkdir()
+            (docs_path / "index.md").write_text("# Home")
+            output = Path(tmpdir) / "site"
+            output.mkdir()
+            (output / "stale.html").write_text("old")
+
+            assert self.run_build(docs_path, output).exit_code == 0
+
+            assert output.is_symlink()
+            assert (output / "index.html").is_file()
+            assert not (output / "stale.html").exists()
+            assert len(os.listdir(Path(tmpdir) / ".site.builds")) == 1
+
+    def test_running_server_follows_swapped_release(self):
+        """Test a server started on the output serves the new release after a rebuild."""
+        from mkpy.server import BuiltServer
+        from mkpy.static import BuiltSite
+
+        with tempfile.TemporaryDirectory() as tmpdir:
+            docs_path = Path(tmpdir) / "docs"
+            docs_path.mkdir()
+            (docs_path / "index.md").write_text("# Home v1")
+            output = Path(tmpdir) / "site"
+            assert self.run_build(docs_path, output).exit_code == 0
+
+            server = BuiltServer(BuiltSite(str(output)), port=0)
+            threading.Thread(target=server.serve_forever, daemon=True).start()
+            url = f"http://127.0.0.1:{server.server_address[1]}/"
+            try:
+                _, before = fetch(url)
+                (docs_path / "index.md").write_text("# Home v2")
+                assert self.run_build(docs_path, output).exit_code == 0
+                _, after = fetch(url)
+            finally:
+                server.shutdown()
+                server.server_close()
+
+            assert "Home v1" in before and "Home v2" in after
+
+    def test_failed_strict_build_keeps_previous_output(self):
+        """Test a --strict failure discards staging and leaves the live output alone."""
+        with tempfile.TemporaryDirectory() as tmpdir:
+            docs_path = Path(tmpdir) / "docs"
+            docs_path.mkdir()
+            (docs_path / "index.md").write_text("# Home")
+            output = Path(tmpdir) / "site"
+
+            assert self.run_build(docs_path, output, "--strict").exit_code == 0
+            (docs_path / "index.md").write_text("# Home\n\n[Gone](/gone)")
+            result = self.run_build(docs_path, output, "--strict")
+
+            assert result.exit_code == 1
+            assert "Gone" not in (output / "index.html").read_text()
+            assert len(os.listdir(Path(tmpdir) / ".site.builds")) == 1
+
+class TestHighlight:
+    """Test server-side code highlighting."""
+
+    def test_highlight_fenced_code(self):
+        """Test known languages are highlighted and others stay plain."""
+        md = "```python\nx = 1 < 2\n```\n\n```no-such-language\nplain\n```"
+        html = render_markdown(md, highlight=True)
+
+        assert '<div class="highlight">' in html
+        assert '<span class="mi">1</span>' in html
+        assert '<pre><code class="language-no-such-language">plain' in html
+
+    def test_highlight_memoized(self):
+        """Test repeated snippets are lexed once."""
+        from mkpy.markdown import _highlighted, highlight_code
+
+        code = "def memoized_snippet():\n    return 42\n"
+        first = highlight_code("python", code)
+        hits = _highlighted.hits
+
+        assert highlight_code("python", code) == first
+        assert _highlighted.hits == hits + 1
+
+    def test_docs_highlight_option(self):
+        """Test Docs highlights by default and adds the Pygments CSS."""
+        with tempfile.TemporaryDirectory() as tmpdir:
+            docs_path = Path(tmpdir) / "docs"
+            docs_path.mkdir()
+            (docs_path / "index.md").write_text("```python\nprint('hi')\n```")
+
+            html = Docs(folder=str(docs_path)).render(str(docs_path / "index.md"))
+            plain = Docs(folder=str(docs_path), highlight=False).render(
+                str(docs_path / "index.md")
+            )
+
+            assert '<span class="nb">print</span>' in html
+            assert ".highlight" in html
+            assert "print('hi')" in plain
+            assert '<div class="highlight">' not in plain
+
+
+class TestInstantNav:
+    """Test content-only fragments for client-side navigation."""
+
+    def test_fragment_endpoints(self):
+        """Test both fragment URLs return the page body only."""
+        with tempfile.TemporaryDirectory() as tmpdir:
+            docs_path = Path(tmpdir) / "docs"
+            docs_path.mkdir()
+            (docs_path / "index.md").write_text("# Home")
+            (docs_path / "guide").mkdir()
+            (docs_path / "guide" / "install.md").write_text("# Install\n\nSteps")
+
+            docs = Docs(folder=str(docs_path), instant_nav=True)
+            with running_server(docs) as url:
+                status, page = fetch(url + "/guide/install")
+                _, by_query = fetch(url + "/guide/install?fragment=1")
+                _, by_path = fetch(url + "/_mkpy/frag/guide/install")
+                _, home = fetch(url + "/_mkpy/frag")
+                missing, _ = fetch(url + "/_mkpy/frag/sitemap.xml")
+
+            assert status == 200
+            assert "X-Mkpy-Fragment" in page
+            assert "'/_mkpy/frag'" in page and 'data-base=""' in page
+            assert missing == 404
+            assert by_query == by_path
+            assert "<p>Steps</p>" in by_query
+            assert "<nav" not in by_query and "<html" not in by_query
+            assert len(by_query) < len(page)
+            assert "Home" in home
+
+    def test_fragments_disabled_by_default(self):
+        """Test the fragment query is ignored unless instant_nav is on."""
+        with tempfile.TemporaryDirectory() as tmpdir:
+            docs_path = Path(tmpdir) / "docs"
+            docs_path.mkdir()
+            (docs_path / "index.md").write_text("# Home")
+
+            docs = Docs(folder=str(docs_path))
+            with running_server(docs) as url:
+                _, body = fetch(url + "/?fragment=1")
+                status, _ = fetch(url + "/_mkpy/frag")
+
+            assert "<html>" in body
+            assert "X-Mkpy-Fragment" not in body
+            assert status == 404
+
+
+class TestLimits:
+    """Tests for server capacity limits."""
+
+    def make_blocked_docs(self, root, limits, monkeypatch):
+        """Docs whose conversion of index.md blocks until the returned event is set."""
+        import mkpy.docs
+
+        docs_path = Path(root) / "docs"
+        docs_path.mkdir()
+        (docs_path / "index.md").write_text("# Slow home")
+        (docs_path / "about.md").write_text("# About")
+        (docs_path / "other.md").write_text("# Other")
+        docs = Docs(folder=str(docs_path))
+        docs.limits = limits
+        started, release = threading.Event(), threading.Event()
+        convert = mkpy.docs.render_markdown
+
+        def blocked_convert(md, highlight=False):
+            if "Slow" in md:
+                started.set()
+                release.wait(5)
+            return convert(md, highlight=highlight)
+
+        monkeypatch.setattr(mkpy.docs, "render_markdown", blocked_convert)
+        return docs, started, release
+
+    def test_saturated_renders_get_503(self, monkeypatch):
+        """Test only cold conversions beyond max_renders are rejected with Retry-After."""
+        with tempfile.TemporaryDirectory() as tmpdir:
+            limits = Limits(max_renders=1, render_wait=0, retry_after=3)
+            docs, started, release = self.make_blocked_docs(tmpdir, limits, monkeypatch)
+            with running_server(docs) as url:
+                assert fetch(url + "/about")[0] == 200
+                results = []
+                threads = [
+                    threading.Thread(target=lambda: results.append(fetch(url + "/")))
+                    for _ in range(2)
+                ]
+                threads[0].start()
+                assert started.wait(5)
+                threads[1].start()
+                with pytest.raises(urllib.error.HTTPError) as error:
+                    urllib.request.urlopen(url + "/other")
+                cached, _ = fetch(url + "/about")
+                _, metrics = fetch(url + "/_mkpy/metrics")
+                release.set()
+                for thread in threads:
+                    thread.join(5)
+
+            assert error.value.code == 503
+            assert error.value.headers["Retry-After"] == "3"
+            assert cached == 200
+            assert [status for status, _ in results] == [200, 200]
+            assert 'mkpy_rejected_requests_total{reason="renders"} 1' in metrics
+
+    def test_full_queue_gets_503(self, monkeypatch):
+        """Test connections beyond the queue depth are rejected immediately."""
+        with tempfile.TemporaryDirectory() as tmpdir:
+            limits = Limits(workers=1, queue_depth=1)
+            docs, started, release = self.make_blocked_docs(tmpdir, limits, monkeypatch)
+            docs.port = 0
+            server = create_server(docs)
+            threading.Thread(target=server.serve_forever, daemon=True).start()
+            address = ("127.0.0.1", server.server_address[1])
+            try:
+                busy = threading.Thread(target=fetch, args=(f"http://{address[0]}:{address[1]}/",))
+                busy.start()
+                assert started.wait(5)
+                with socket.create_connection(address, timeout=5) as waiting:
+                    for _ in range(100):
+                        if server._pending.qsize() == 1:
+                            break
+                        threading.Event().wait(0.01)
+                    with socket.create_connection(address, timeout=5) as rejected:
+                        rejected.sendall(b"GET / HTTP/1.0\r\n\r\n")
+                        response = rejected.recv(4096)
+                    release.set()
+                    waiting.sendall(b"GET / HTTP/1.0\r\n\r\n")
+                    served = waiting.recv(4096)
+                busy.join(5)
+            finally:
+                release.set()
+                server.shutdown()
+                server.server_close()
+
+            assert response.startswith(b"HTTP/1.0 503")
+            assert b"Retry-After: 1" in response
+            assert served.startswith(b"HTTP/1.0 200")
+
+    def test_read_timeout_closes_idle_connection(self):
+        """Test a client that never sends its request is disconnected."""
+        with tempfile.TemporaryDirectory() as tmpdir:
+            docs_path = Path(tmpdir) / "docs"
+            docs_path.mkdir()
+            (docs_path / "index.md").write_text("# Home")
+            docs = Docs(folder=str(docs_path))
+            docs.limits = Limits(read_timeout=0.2)
+            with running_server(docs) as url:
+                port = int(url.rsplit(":", 1)[1])
+                with socket.create_connection(("127.0.0.1", port), timeout=5) as idle:
+                    assert idle.recv(4096) == b""
+                status, _ = fetch(url + "/")
+
+            assert status == 200
+
+    def test_read_timeout_bounds_slow_request(self):
+        """Test a client trickling its request in is cut off after read_timeout in total."""
+        with tempfile.TemporaryDirectory() as tmpdir:
+            docs_path = Path(tmpdir) / "docs"
+            docs_path.mkdir()
+            (docs_path / "index.md").write_text("# Home")
+            docs = Docs(folder=str(docs_path))
+            docs.limits = Limits(workers=1, read_timeout=0.3)
+            with running_server(docs) as url:
+                port = int(url.rsplit(":", 1)[1])
+                started = time.monotonic()
+                slow = socket.create_connection(("127.0.0.1", port), timeout=5)
+                with slow, pytest.raises(OSError):
+                    for byte in b"GET / HTTP/1.1\r\nX-Slow: " + b"a" * 100:
+                        slow.sendall(bytes([byte]))
+                        time.sleep(0.1)
+                elapsed = time.monotonic() - started
+                status, _ = fetch(url + "/")
+
+            assert elapsed < 2
+            assert status == 200
+
+
+    def test_serve_keeps_limits_from_config_file(self, monkeypatch):
+        """Test mkpy serve only overrides configured limits with options passed."""
+        from typer.testing import CliRunner
+
+        from mkpy.cli import app
+
+        served = []
+        monkeypatch.setattr(Docs, "run", lambda self: served.append(self.limits))
+        with tempfile.TemporaryDirectory() as tmpdir:
+            (Path(tmpdir) / "docs").mkdir()
+            config = Path(tmpdir) / "main.py"
+            config.write_text(
+                "from mkpy import Docs\n"
+                "from mkpy.server import Limits\n"
+                f"docs = Docs(folder={str(Path(tmpdir) / 'docs')!r})\n"
+                "docs.limits = Limits(workers=3, read_timeout=4.0)\n"
+            )
+            result = CliRunner().invoke(app, ["serve", str(config), "--read-timeout", "2"])
+
+        assert result.exit_code == 0, result.output
+        assert served[0].workers == 3
+        assert served[0].read_timeout == 2.0
+
+
+class TestSingleFlight:
+    """Tests for deduplicated concurrent renders."""
+
+    def burst(self, docs, file_path, callers=8):
+        barrier = threading.Barrier(callers)
+        results = []
+
+        def call():
+            barrier.wait()
+            results.append(docs.render_content(file_path))
+
+        threads = [threading.Thread(target=call) for _ in range(callers)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join(5)
+        return results
+
+    def test_burst_converts_once(self, monkeypatch):
+        """Test concurrent requests for a cold page share one conversion."""
+        import mkpy.docs
+
+        conversions = []
+        convert = mkpy.docs.render_markdown
+
+        def slow_convert(md, highlight=False):
+            conversions.append(md)
+            threading.Event().wait(0.2)
+            return convert(md, highlight=highlight)
+
+        monkeypatch.setattr(mkpy.docs, "render_markdown", slow_convert)
+        with tempfile.TemporaryDirectory() as tmpdir:
+            page = Path(tmpdir) / "index.md"
+            page.write_text("# Home\n\nFirst")
+            docs = Docs(folder=tmpdir)
+
+            first = self.burst(docs, str(page))
+            page.write_text("# Home\n\nSecond version")
+            stat = os.stat(page)
+            os.utime(page, ns=(stat.st_atime_ns, stat.st_mtime_ns + 1_000_000))
+            second = self.burst(docs, str(page))
+
+        assert len(conversions) == 2
+        assert len(first) == 8 and len(set(first)) == 1 and "First" in first[0]
+        assert len(second) == 8 and len(set(second)) == 1 and "Second version" in second[0]
+        assert len(docs.flights) == 0
+
+    def test_save_during_conversion_is_not_cached_as_new(self, monkeypatch):
+        """Test content read before a save is cached under the version it read."""
+        import mkpy.docs
+
+        convert = mkpy.docs.render_markdown
+        with tempfile.TemporaryDirectory() as tmpdir:
+            page = Path(tmpdir) / "index.md"
+            page.write_text("# Home\n\nOld")
+            docs = Docs(folder=tmpdir)
+
+            def saving_convert(md, highlight=False):
+                page.write_text("# Home\n\nNew text")
+                stat = os.stat(page)
+                os.utime(page, ns=(stat.st_atime_ns, stat.st_mtime_ns + 1_000_000))
+                return convert(md, highlight=highlight)
+
+            monkeypatch.setattr(mkpy.docs, "render_markdown", saving_convert)
+            first = docs.render_content(str(page))
+            monkeypatch.setattr(mkpy.docs, "render_markdown", convert)
+            second = docs.render_content(str(page))
+
+        assert "Old" in first
+        assert "New text" in second
+
+    def test_error_reaches_all_waiters(self):
+        """Test callers waiting on a failed call receive its exception."""
+        from mkpy.singleflight import SingleFlight
+
+        flights = SingleFlight()
+        started = threading.Event()
+        errors = []
+
+        def failing():
+            started.set()
+            threading.Event().wait(0.3)
+            raise ValueError("broken page")
+
+        def call(compute):
+            try:
+                flights.do("key", compute)
+            except ValueError as error:
+                errors.append(error)
+
+        leader = threading.Thread(target=call, args=(failing,))
+        leader.start()
+        started.wait(5)
+        follower = threading.Thread(target=call, args=(lambda: "unused",))
+        follower.start()
+        leader.join(5)
+        follower.join(5)
+
+        assert len(errors) == 2 and errors[0] is errors[1]
+        assert flights.do("key", lambda: "fresh") == ("fresh", False)
+
+
+class TestMetadata:
+    """Tests for front matter and the page metadata index."""
+
+    def make_docs(self, root, **kwargs):
+        docs_path = Path(root) / "docs"
+        docs_path.mkdir()
+        (docs_path / "index.md").write_text("# Home\n\n## Welcome")
+        (docs_path / "about.md").write_text("---\ntitle: About us\norder: 2\n---\n# About")
+        (docs_path / "install.md").write_text(
+            "---\norder: 1\n---\n# Install\n\n```\n# not a heading\n```\n\n## Download\n\n### From source"
+        )
+        (docs_path / "draft.md").write_text("---\nhidden: true\n---\n# Draft")
+        return Docs(folder=str(docs_path), **kwargs)
+
+    def test_front_matter_orders_and_hides_pages(self):
+        """Test order and hidden from front matter drive navigation, search and sitemap."""
+        with tempfile.TemporaryDirectory() as tmpdir:
+            docs = self.make_docs(tmpdir)
+
+            def no_read(path):
+                raise AssertionError("source re-read for metadata")
+
+            docs.pages.read = no_read
+            nav = docs.navigation
+            index = json.loads(docs.search_index())
+            sitemap = docs.generate_sitemap("https://docs.example.com")
+
+            assert nav == [("/install", "Install"), ("/about", "About us"), ("/", "Home")]
+            assert [entry["url"] for entry in index] == ["/install", "/about", "/"]
+            assert index[0]["headings"] == [
+                {"text": "Download", "anchor": "download"},
+                {"text": "From source", "anchor": "from-source"},
+            ]
+            assert "/draft" not in sitemap and "/install" in sitemap
+
+    def test_front_matter_stripped_and_toc_matches_ids(self):
+        """Test pages render without front matter and TOC links hit heading ids."""
+        with tempfile.TemporaryDirectory() as tmpdir:
+            docs = self.make_docs(tmpdir, show_toc=True)
+            with running_server(docs) as url:
+                _, page = fetch(url + "/install")
+                status, draft = fetch(url + "/draft")
+                _, search = fetch(url + "/_mkpy/search.json")
+
+            main = page.split("<main>")[1]
+            assert "order: 1" not in main and "<hr" not in main
+            assert '<a href="#download">Download</a>' in page
+            assert 'id="download"' in page and 'id="from-source"' in page
+            assert status == 200 and "hidden: true" not in draft.split("<main>")[1]
+            assert '"/draft"' not in search and '"About us"' in search
+
+
+@pytest.mark.skipif(shutil.which("git") is None, reason="git is not installed")
+class TestGitVersions:
+    """Tests for serving docs from git refs."""
+
+    def git(self, repo, *args):
+        import subprocess
+
+        subprocess.run(
+            ["git", "-C", str(repo), "-c", "user.name=mkpy", "-c", "user.email=mkpy@example.com"]
+            + list(args),
+            check=True,
+            capture_output=True,
+        )
+
+    def make_repo(self, root):
+        repo = Path(root) / "repo"
+        docs_path = repo / "docs"
+        docs_path.mkdir(parents=True)
+        self.git(repo, "init", "-q")
+        (docs_path / "index.md").write_text("# Home\n\nShared page")
+        (docs_path / "install.md").write_text("# Install\n\npip install mkpy==1.3")
+        self.git(repo, "add", "-A")
+        self.git(repo, "commit", "-q", "-m", "v1.3")
+        self.git(repo, "tag", "v1.3")
+        (docs_path / "install.md").write_text("# Install\n\npip install mkpy==1.4")
+        (docs_path / "changes.md").write_text("# Changes")
+        self.git(repo, "add", "-A")
+        self.git(repo, "commit", "-q", "-m", "v1.4")
+        self.git(repo, "tag", "v1.4")
+        (docs_path / "install.md").write_text("# Install\n\nuncommitted")
+        return repo
+
+    def test_versions_from_tags_share_unchanged_pages(self):
+        """Test two tags are served side by side and unchanged pages render once."""
+        with tempfile.TemporaryDirectory() as tmpdir:
+            repo = self.make_repo(tmpdir)
+            sites = Sites()
+            old = sites.mount("/v1.3", Docs(folder="docs", git_ref="v1.3", repo=str(repo)))
+            new = sites.mount("/v1.4", Docs(folder="docs", git_ref="v1.4", repo=str(repo)))
+
+            with running_server(sites) as url:
+                _, old_install = fetch(url + "/v1.3/install")
+                _, new_install = fetch(url + "/v1.4/install")
+                status, _ = fetch(url + "/v1.3/changes")
+                fetch(url + "/v1.3/")
+                fetch(url + "/v1.4/")
+
+            assert "mkpy==1.3" in old_install and "mkpy==1.4" in new_install
+            assert "uncommitted" not in new_install
+            assert status == 404
+            assert sorted(old.routes) == ["/", "/install"]
+            assert sorted(new.routes) == ["/", "/changes", "/install"]
+            assert len(sites.cache) == 3
+            assert sites.cache.hits == 1
+
+    def test_unknown_ref(self):
+        """Test an unknown ref is reported clearly."""
+        with tempfile.TemporaryDirectory() as tmpdir:
+            repo = self.make_repo(tmpdir)
+            with pytest.raises(ValueError, match="v9.9"):
+                Docs(folder="docs", git_ref="v9.9", repo=str(repo))